@@ -99,7 +99,7 @@ case "$SERVICE_NAME" in
     echo "Starting worker service..."
     cd statuspage
     export PYTHONPATH="/app/statuspage:$PYTHONPATH"
-    exec python3 manage.py rqworker high default low
+    exec python3 manage.py rqworker high default low --worker-class utilities.rqworker.PersistentWorker
     ;;
   *)
     echo "Unknown service: $SERVICE_NAME"
@@ -82,6 +82,13 @@ class Component(StatusPageModel):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status, so a status change can be detected on save without querying the database
+        instance._previous_status = instance.__dict__.get('status')
+        return instance
+
     def get_absolute_url(self):
         return reverse('components:component', args=[self.pk])
 
@@ -0,0 +1,34 @@
+import copy
+
+from subscribers.models import Subscriber
+from subscribers.notifications import Notification, subscribed_to_components
+from .models import Component
+
+__all__ = (
+    'get_component_status_notification',
+)
+
+
+def get_component_status_notification(component_id, previous_status=None):
+    """
+    Return the Notification about the status change of a Component from `previous_status` to its current status for
+    the Subscribers of the Component, or None if the Component no longer exists, is hidden or has returned to its
+    previous status.
+    """
+    component = Component.objects.filter(pk=component_id).first()
+    if component is None or not component.visibility or component.status == previous_status:
+        return None
+
+    old_component = copy.copy(component)
+    old_component.status = previous_status
+    return Notification(
+        template='components/update',
+        context={
+            'old_component': old_component,
+            'component': component,
+        },
+        subject=f'Component "{component.name}": Status Updated',
+        get_headers=lambda subscriber_id: {},
+        recipients=Subscriber.objects.filter(subscribed_to_components([component.pk]), email_verified_at__isnull=False),
+        summary=f'{old_component.get_status_display()} → {component.get_status_display()}',
+    )
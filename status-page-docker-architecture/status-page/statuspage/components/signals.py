@@ -1,22 +1,42 @@
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from components.models import Component
+from components.models import Component, ComponentGroup
+from statuspage.config import get_config
+from statuspage.snapshot import invalidate_home_snapshot
+from subscribers.models import OutboxEntry
+from subscribers.outbox import OUTBOX_MAX_ATTEMPTS, add_to_outbox
 
 
-@receiver(pre_save, sender=Component)
-def send_notifications(sender, instance, **kwargs):
-    try:
-        old_component = Component.objects.get(pk=instance.pk)
-        subscribers = instance.subscribers.all()
+@receiver(post_save, sender=Component)
+def send_notifications(sender, instance, created, **kwargs):
+    previous_status = getattr(instance, '_previous_status', None)
+    instance._previous_status = instance.status
+    if created or previous_status is None or previous_status == instance.status or not instance.visibility:
+        return None
 
-        if old_component.status == instance.status or not instance.visibility:
-            return None
+    # Status changes are debounced: further changes while an event is undelivered are merged into it, as the status at
+    # expansion time is compared with the one before the first change, which also drops changes that were reverted. The
+    # event is locked until the change is committed, so it cannot be expanded meanwhile; an event which is locked
+    # already has been claimed by a dispatcher, which may not see this change, so a new event is recorded instead.
+    with transaction.atomic():
+        pending = OutboxEntry.objects.select_for_update(skip_locked=True).filter(
+            event='component_status_updated',
+            object_id=instance.pk,
+            subscriber__isnull=True,
+            delivered_at__isnull=True,
+            attempts__lt=OUTBOX_MAX_ATTEMPTS,
+        ).first()
+        if pending is None:
+            add_to_outbox(
+                'component_status_updated', instance.pk,
+                data={'previous_status': previous_status},
+                delay=get_config().COMPONENT_STATUS_NOTIFICATION_DELAY,
+            )
 
-        for subscriber in subscribers:
-            subscriber.send_mail(subject=f'Component "{instance.name}": Status Updated', template='components/update', context={
-                'old_component': old_component,
-                'component': instance,
-            })
-    except:
-        pass
+
+@receiver((post_save, post_delete), sender=Component)
+@receiver((post_save, post_delete), sender=ComponentGroup)
+def clear_home_snapshot(sender, **kwargs):
+    invalidate_home_snapshot()
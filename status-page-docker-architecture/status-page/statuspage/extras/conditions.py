@@ -1,15 +1,25 @@
 import functools
+import operator
 import re
+import threading
+from collections import OrderedDict
 
 __all__ = (
     'Condition',
     'ConditionSet',
+    'compile_conditions',
 )
 
 
 AND = 'and'
 OR = 'or'
 
+# Maximum number of compiled rule sets kept per process
+CONDITIONS_CACHE_SIZE = 4096
+
+_compiled_conditions = OrderedDict()
+_compiled_conditions_lock = threading.Lock()
+
 
 def is_ruleset(data):
     """
@@ -57,22 +67,30 @@ class Condition:
             raise ValueError(f"Invalid type for {op} operation: {type(value)}")
 
         self.attr = attr
+        self.path = tuple(attr.split('.'))
         self.value = value
+        self.op = op
         self.eval_func = getattr(self, f'eval_{op}')
         self.negate = negate
+        if op == self.REGEX:
+            try:
+                self.pattern = re.compile(value)
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression {value!r}: {e}")
+
+    @staticmethod
+    def _get(obj, key):
+        if isinstance(obj, list):
+            return [dict.get(i, key) for i in obj]
+
+        return dict.get(obj, key)
 
     def eval(self, data):
         """
         Evaluate the provided data to determine whether it matches the condition.
         """
-        def _get(obj, key):
-            if isinstance(obj, list):
-                return [dict.get(i, key) for i in obj]
-
-            return dict.get(obj, key)
-
         try:
-            value = functools.reduce(_get, self.attr.split('.'), data)
+            value = functools.reduce(self._get, self.path, data)
         except TypeError:
             # Invalid key path
             value = None
@@ -82,6 +100,60 @@ class Condition:
             return not result
         return result
 
+    def compile(self):
+        """
+        Return a function which evaluates data like `eval()`, with the attribute lookup and the comparison resolved in
+        advance.
+        """
+        get = self._get
+
+        if len(self.path) == 1:
+            key = self.path[0]
+
+            def lookup(data):
+                if isinstance(data, list):
+                    return [dict.get(i, key) for i in data]
+                return dict.get(data, key)
+        else:
+            path = self.path
+
+            def lookup(data):
+                for key in path:
+                    data = get(data, key)
+                return data
+
+        expected = self.value
+        if self.op == self.REGEX:
+            match = self.pattern.match
+
+            def compare(value):
+                return match(value) is not None
+        elif self.op == self.CONTAINS:
+            def compare(value):
+                return expected in value
+        else:
+            # The expected value is the first operand, so the operators of the ordering comparisons are mirrored
+            compare = functools.partial({
+                self.EQ: operator.eq,
+                self.GT: operator.lt,
+                self.GTE: operator.le,
+                self.LT: operator.gt,
+                self.LTE: operator.ge,
+                self.IN: operator.contains,
+            }[self.op], expected)
+
+        def evaluate(data):
+            try:
+                value = lookup(data)
+            except TypeError:
+                # Invalid key path
+                value = None
+            return compare(value)
+
+        if self.negate:
+            return lambda data: not evaluate(data)
+        return evaluate
+
     # Equivalency
 
     def eval_eq(self, value):
@@ -115,7 +187,7 @@ class Condition:
     # Regular expressions
 
     def eval_regex(self, value):
-        return re.match(self.value, value) is not None
+        return self.pattern.match(value) is not None
 
 
 class ConditionSet:
@@ -153,3 +225,50 @@ class ConditionSet:
         """
         func = any if self.logic == 'or' else all
         return func(d.eval(data) for d in self.conditions)
+
+    def compile(self):
+        """
+        Return a function which evaluates data like `eval()`, built from the compiled Conditions and nested
+        ConditionSets.
+        """
+        evaluators = tuple(condition.compile() for condition in self.conditions)
+        if len(evaluators) == 1:
+            return evaluators[0]
+
+        if self.logic == OR:
+            def evaluate(data):
+                for evaluator in evaluators:
+                    if evaluator(data):
+                        return True
+                return False
+        else:
+            def evaluate(data):
+                for evaluator in evaluators:
+                    if not evaluator(data):
+                        return False
+                return True
+
+        return evaluate
+
+
+def compile_conditions(ruleset, cache_key=None):
+    """
+    Return a function evaluating data against the given rule set (see ConditionSet). If a cache key is given, the
+    function is kept in an LRU cache of CONDITIONS_CACHE_SIZE rule sets; the key must change whenever the rule set does.
+    """
+    if cache_key is None:
+        return ConditionSet(ruleset).compile()
+
+    with _compiled_conditions_lock:
+        evaluator = _compiled_conditions.get(cache_key)
+        if evaluator is not None:
+            _compiled_conditions.move_to_end(cache_key)
+            return evaluator
+
+    evaluator = ConditionSet(ruleset).compile()
+    with _compiled_conditions_lock:
+        _compiled_conditions[cache_key] = evaluator
+        if len(_compiled_conditions) > CONDITIONS_CACHE_SIZE:
+            _compiled_conditions.popitem(last=False)
+
+    return evaluator
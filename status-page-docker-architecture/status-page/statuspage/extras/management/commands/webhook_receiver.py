@@ -1,6 +1,6 @@
 import json
 import sys
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 from django.core.management.base import BaseCommand
 
@@ -9,6 +9,10 @@ request_counter = 1
 
 
 class WebhookHandler(BaseHTTPRequestHandler):
+    # Keep connections alive, like most real webhook receivers; the response headers and body are written separately,
+    # so Nagle's algorithm would delay each response on a reused connection
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
     show_headers = True
 
     def __getattr__(self, item):
@@ -33,9 +37,11 @@ class WebhookHandler(BaseHTTPRequestHandler):
         global request_counter
 
         # Send a 200 response regardless of the request content
+        response = b'Webhook received!\n'
         self.send_response(200)
+        self.send_header('Content-Length', str(len(response)))
         self.end_headers()
-        self.wfile.write(b'Webhook received!\n')
+        self.wfile.write(response)
 
         # Print the request headers
         if self.show_headers:
@@ -81,7 +87,7 @@ class Command(BaseCommand):
         WebhookHandler.show_headers = not options['no_headers']
 
         self.stdout.write('Listening on port http://localhost:{}. Stop with {}.'.format(port, quit_command))
-        httpd = HTTPServer(('localhost', port), WebhookHandler)
+        httpd = ThreadingHTTPServer(('localhost', port), WebhookHandler)
 
         try:
             httpd.serve_forever()
@@ -165,6 +165,15 @@ class Webhook(ChangeLoggedModel):
                 'ca_file_path': 'Do not specify a CA certificate file if SSL verification is disabled.'
             })
 
+    def get_revision_key(self, field):
+        """
+        Return the key under which the compiled template or conditions of the given field are cached, which changes
+        with every revision of the Webhook, or None if the Webhook has not been saved.
+        """
+        if self.pk is None or self.last_updated is None:
+            return None
+        return 'webhook', self.pk, self.last_updated, field
+
     def render_headers(self, context):
         """
         Render additional_headers and return a dict of Header: Value pairs.
@@ -172,7 +181,7 @@ class Webhook(ChangeLoggedModel):
         if not self.additional_headers:
             return {}
         ret = {}
-        data = render_jinja2(self.additional_headers, context)
+        data = render_jinja2(self.additional_headers, context, self.get_revision_key('additional_headers'))
         for line in data.splitlines():
             header, value = line.split(':', 1)
             ret[header.strip()] = value.strip()
@@ -183,7 +192,7 @@ class Webhook(ChangeLoggedModel):
         Render the body template, if defined. Otherwise, jump the context as a JSON object.
         """
         if self.body_template:
-            return render_jinja2(self.body_template, context)
+            return render_jinja2(self.body_template, context, self.get_revision_key('body_template'))
         else:
             return json.dumps(context, cls=JSONEncoder)
 
@@ -191,7 +200,7 @@ class Webhook(ChangeLoggedModel):
         """
         Render the payload URL.
         """
-        return render_jinja2(self.payload_url, context)
+        return render_jinja2(self.payload_url, context, self.get_revision_key('payload_url'))
 
 
 class ConfigRevision(models.Model):
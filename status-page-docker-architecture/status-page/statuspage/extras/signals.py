@@ -7,6 +7,7 @@ from django.db.models.signals import m2m_changed, post_save, pre_delete
 from django.dispatch import receiver, Signal
 
 from statuspage.context import current_request, webhooks_queue
+from statuspage.snapshot import invalidate_home_snapshot
 from .choices import ObjectChangeActionChoices
 from .models import ConfigRevision, ObjectChange
 from .webhooks import enqueue_object, get_snapshots, serialize_for_webhook
@@ -140,3 +141,4 @@ def update_config(sender, instance, **kwargs):
     Update the cached Status-Page configuration when a new ConfigRevision is created.
     """
     instance.activate()
+    invalidate_home_snapshot()
@@ -1,3 +1,74 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .conditions import ConditionSet, compile_conditions
+
+
+class CompileConditionsTestCase(SimpleTestCase):
+    data = (
+        {'status': 'active', 'count': 5, 'ratio': 0.5, 'enabled': True, 'tags': ['a', 'b'], 'parent': {'id': 1}},
+        {'status': 'planned', 'count': 10, 'ratio': 1.5, 'enabled': False, 'tags': [], 'parent': None},
+        {'status': 'active-2', 'count': 0, 'ratio': 0.0, 'enabled': True, 'tags': ['b'], 'parent': {'id': 2}},
+        {'status': None, 'count': None, 'tags': None},
+        {'components': [{'status': 'active'}, {'status': 'planned'}]},
+    )
+    rules = (
+        {'attr': 'status', 'value': 'active'},
+        {'attr': 'status', 'value': 'active', 'negate': True},
+        {'attr': 'status', 'value': 'act', 'op': 'contains'},
+        {'attr': 'status', 'value': r'^active(-\d+)?$', 'op': 'regex'},
+        {'attr': 'count', 'value': 5, 'op': 'gt'},
+        {'attr': 'count', 'value': 5, 'op': 'gte'},
+        {'attr': 'count', 'value': 5, 'op': 'lt'},
+        {'attr': 'count', 'value': 5, 'op': 'lte'},
+        {'attr': 'ratio', 'value': 1.0, 'op': 'lt', 'negate': True},
+        {'attr': 'enabled', 'value': True},
+        {'attr': 'status', 'value': ['active', 'planned'], 'op': 'in'},
+        {'attr': 'tags', 'value': 'b', 'op': 'contains'},
+        {'attr': 'parent.id', 'value': 1},
+        {'attr': 'parent.id', 'value': None},
+        {'attr': 'components.status', 'value': 'planned', 'op': 'contains'},
+        {'attr': 'missing', 'value': None},
+    )
+
+    def assertCompiledMatchesEval(self, ruleset):
+        compiled = compile_conditions(ruleset)
+        condition_set = ConditionSet(ruleset)
+        for data in self.data:
+            try:
+                expected = condition_set.eval(data)
+            except TypeError:
+                with self.assertRaises(TypeError):
+                    compiled(data)
+            else:
+                self.assertIs(compiled(data), expected, (ruleset, data))
+
+    def test_single_conditions(self):
+        for rule in self.rules:
+            with self.subTest(rule=rule):
+                self.assertCompiledMatchesEval({'and': [rule]})
+
+    def test_condition_sets(self):
+        for logic in ('and', 'or'):
+            for first, second in zip(self.rules, self.rules[1:]):
+                with self.subTest(logic=logic, first=first, second=second):
+                    self.assertCompiledMatchesEval({logic: [first, second]})
+
+    def test_nested_condition_sets(self):
+        self.assertCompiledMatchesEval({'or': [
+            {'attr': 'enabled', 'value': False},
+            {'and': [
+                {'attr': 'status', 'value': 'active', 'op': 'contains'},
+                {'attr': 'count', 'value': 1, 'op': 'gte'},
+            ]},
+        ]})
+
+    def test_cache(self):
+        ruleset = {'and': [{'attr': 'status', 'value': 'active'}]}
+        evaluator = compile_conditions(ruleset, cache_key='test_cache_1')
+        self.assertIs(compile_conditions(ruleset, cache_key='test_cache_1'), evaluator)
+        self.assertIsNot(compile_conditions(ruleset, cache_key='test_cache_2'), evaluator)
+
+    def test_invalid_ruleset(self):
+        for ruleset in ({}, {'xor': []}, {'and': [{'attr': 'status', 'value': 'active', 'op': 'unknown'}]}):
+            with self.subTest(ruleset=ruleset), self.assertRaises(ValueError):
+                compile_conditions(ruleset)
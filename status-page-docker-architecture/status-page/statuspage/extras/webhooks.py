@@ -4,6 +4,7 @@ import hmac
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from django_rq import get_queue
+from rq import Queue
 
 from statuspage.config import get_config
 from statuspage.constants import RQ_QUEUE_DEFAULT
@@ -79,9 +80,11 @@ def enqueue_object(queue, instance, user, request_id, action):
 
 def flush_webhooks(queue):
     """
-    Flush a list of object representation to RQ for webhook processing.
+    Flush a list of object representation to RQ for webhook processing. Webhooks whose conditions do not match the
+    serialized data are skipped; the jobs of all other Webhooks are enqueued in a single pipeline.
     """
     from django.conf import settings
+    from .webhooks_worker import eval_conditions
     
     # Skip webhook processing if no RQ queues are configured (e.g., for ElastiCache)
     if not settings.RQ_QUEUES:
@@ -94,6 +97,7 @@ def flush_webhooks(queue):
         'type_update': {},
         'type_delete': {},
     }
+    jobs = []
 
     for data in queue:
 
@@ -113,16 +117,43 @@ def flush_webhooks(queue):
             )
         webhooks = webhooks_cache[action_flag][content_type]
 
+        # Skip Webhooks whose conditions do not match; if the conditions cannot be evaluated, leave the error to the
+        # worker, so it is recorded with the job
+        matching = []
         for webhook in webhooks:
-            rq_queue.enqueue(
+            try:
+                if not eval_conditions(webhook, data['data']):
+                    continue
+            except Exception:
+                pass
+            matching.append(webhook)
+
+        kwargs = {
+            'model_name': content_type.model,
+            'event': data['event'],
+            'data': data['data'],
+            'snapshots': data['snapshots'],
+            'timestamp': str(timezone.now()),
+            'username': data['username'],
+            'request_id': data['request_id'],
+        }
+
+        # Deliver the event to all Webhooks concurrently from a single job
+        if settings.WEBHOOK_CONCURRENCY and len(matching) > 1:
+            jobs.append(Queue.prepare_data(
+                "extras.webhooks_worker.process_webhooks",
+                kwargs={'webhooks': matching, **kwargs}
+            ))
+            continue
+
+        for webhook in matching:
+            jobs.append(Queue.prepare_data(
                 "extras.webhooks_worker.process_webhook",
-                webhook=webhook,
-                model_name=content_type.model,
-                event=data['event'],
-                data=data['data'],
-                snapshots=data['snapshots'],
-                timestamp=str(timezone.now()),
-                username=data['username'],
-                request_id=data['request_id'],
+                kwargs={'webhook': webhook, **kwargs},
                 retry=get_rq_retry()
-            )
+            ))
+
+    if jobs:
+        with rq_queue.connection.pipeline() as pipeline:
+            rq_queue.enqueue_many(jobs, pipeline=pipeline)
+            pipeline.execute()
@@ -1,16 +1,59 @@
+import datetime
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 
 import requests
 from django.conf import settings
-from django_rq import job
+from django_rq import get_queue, job
 from jinja2.exceptions import TemplateError
+from requests.adapters import HTTPAdapter
+from rq import Retry
 
-from .conditions import ConditionSet
+from statuspage.config import get_config
+from statuspage.constants import RQ_QUEUE_DEFAULT
+from utilities.rqworker import get_rq_retry
+from .conditions import compile_conditions
 from .constants import WEBHOOK_EVENT_TYPES
 from .webhooks import generate_signature
 
 logger = logging.getLogger('netbox.webhooks_worker')
 
+# Maximum number of HTTP sessions kept per worker process; the least recently used session is closed beyond that
+MAX_SESSIONS = 100
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_session(url, verify):
+    """
+    Return the HTTP session of this worker process for requests to the host of the given URL with the given TLS
+    verification setting (a boolean or the path of a CA file). Sessions keep their connections alive, so subsequent
+    deliveries to the same receiver skip the DNS lookup and the TCP and TLS handshakes.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc, verify)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is not None:
+            _sessions.move_to_end(key)
+            return session
+
+        session = requests.Session()
+        session.verify = verify
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.WEBHOOK_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _sessions[key] = session
+        if len(_sessions) > MAX_SESSIONS:
+            _, expired = _sessions.popitem(last=False)
+            expired.close()
+
+        return session
+
 
 def eval_conditions(webhook, data):
     """
@@ -21,16 +64,15 @@ def eval_conditions(webhook, data):
         return True
 
     logger.debug(f'Evaluating webhook conditions: {webhook.conditions}')
-    if ConditionSet(webhook.conditions).eval(data):
+    if compile_conditions(webhook.conditions, webhook.get_revision_key('conditions'))(data):
         return True
 
     return False
 
 
-@job('default')
-def process_webhook(webhook, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+def prepare_webhook_request(webhook, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
     """
-    Make a POST request to the defined Webhook
+    Return the signed HTTP request of the defined Webhook, or None if its conditions are not met
     """
     # Evaluate webhook conditions (if any)
     if not eval_conditions(webhook, data):
@@ -88,12 +130,19 @@ def process_webhook(webhook, model_name, event, data, timestamp, username, reque
     if webhook.secret != '':
         prepared_request.headers['X-Hook-Signature'] = generate_signature(prepared_request.body, webhook.secret)
 
-    # Send the request
-    with requests.Session() as session:
-        session.verify = webhook.ssl_verification
-        if webhook.ca_file_path:
-            session.verify = webhook.ca_file_path
-        response = session.send(prepared_request, proxies=settings.HTTP_PROXIES)
+    return prepared_request
+
+
+def send_webhook_request(webhook, prepared_request):
+    """
+    Send a request prepared by `prepare_webhook_request()`, raising a RequestException if it fails
+    """
+    session = get_session(prepared_request.url, webhook.ca_file_path or webhook.ssl_verification)
+    response = session.send(
+        prepared_request,
+        proxies=settings.HTTP_PROXIES,
+        timeout=(settings.WEBHOOK_CONNECT_TIMEOUT, settings.WEBHOOK_READ_TIMEOUT),
+    )
 
     if 200 <= response.status_code <= 299:
         logger.info(f"Request succeeded; response status {response.status_code}")
@@ -103,3 +152,93 @@ def process_webhook(webhook, model_name, event, data, timestamp, username, reque
         raise requests.exceptions.RequestException(
             f"Status {response.status_code} returned with content '{response.content}', webhook FAILED to process."
         )
+
+
+@job('default')
+def process_webhook(webhook, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+    """
+    Make a POST request to the defined Webhook
+    """
+    prepared_request = prepare_webhook_request(
+        webhook, model_name, event, data, timestamp, username, request_id=request_id, snapshots=snapshots
+    )
+    if prepared_request is None:
+        return
+
+    return send_webhook_request(webhook, prepared_request)
+
+
+@job('default')
+def process_webhooks(webhooks, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+    """
+    Deliver an event to several Webhooks concurrently. The requests are prepared like in `process_webhook()` and then
+    sent on up to WEBHOOK_CONCURRENCY threads sharing the pooled sessions, so the job takes about as long as the
+    slowest delivery. Failed deliveries are retried as individual `process_webhook()` jobs if RQ_RETRY_MAX is set,
+    otherwise the job fails after all deliveries have been attempted. Returns the outcome of each delivery by Webhook
+    ID.
+    """
+    kwargs = {
+        'model_name': model_name,
+        'event': event,
+        'data': data,
+        'timestamp': timestamp,
+        'username': username,
+        'request_id': request_id,
+        'snapshots': snapshots,
+    }
+    outcomes = {}
+    failed = []
+
+    # Rendering the requests is CPU bound, so only the requests themselves are sent concurrently
+    requests_to_send = []
+    for webhook in webhooks:
+        try:
+            prepared_request = prepare_webhook_request(webhook, **kwargs)
+        except Exception as e:
+            outcomes[webhook.pk] = f"Webhook FAILED to process: {e}"
+            failed.append(webhook)
+            continue
+        if prepared_request is None:
+            outcomes[webhook.pk] = "Conditions not met, webhook skipped."
+        else:
+            requests_to_send.append((webhook, prepared_request))
+
+    with ThreadPoolExecutor(max_workers=max(min(settings.WEBHOOK_CONCURRENCY, len(requests_to_send)), 1)) as executor:
+        futures = {
+            executor.submit(send_webhook_request, webhook, prepared_request): webhook
+            for webhook, prepared_request in requests_to_send
+        }
+        for future in as_completed(futures):
+            webhook = futures[future]
+            try:
+                outcomes[webhook.pk] = future.result()
+            except Exception as e:
+                outcomes[webhook.pk] = f"Webhook FAILED to process: {e}"
+                failed.append(webhook)
+
+    if failed:
+        retry = get_rq_retry()
+        if retry is None:
+            raise requests.exceptions.RequestException(
+                f"{len(failed)} of {len(webhooks)} webhooks FAILED to process: {outcomes}"
+            )
+
+        # Each failed delivery has used its first attempt, so it is retried like a failed process_webhook() job: after
+        # the first interval, with the remaining retries and intervals
+        interval = Retry.get_interval(0, retry.intervals)
+        remaining = Retry(max=retry.max - 1, interval=retry.intervals[1:] or retry.intervals) if retry.max > 1 else None
+        queue = get_queue(get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT))
+        with queue.connection.pipeline() as pipeline:
+            for webhook in failed:
+                job_kwargs = {'webhook': webhook, **kwargs}
+                if interval:
+                    queue.enqueue_in(
+                        datetime.timedelta(seconds=interval), process_webhook,
+                        kwargs=job_kwargs, retry=remaining, pipeline=pipeline
+                    )
+                else:
+                    queue.enqueue(process_webhook, kwargs=job_kwargs, retry=remaining, pipeline=pipeline)
+            pipeline.execute()
+        logger.warning(f"Retrying {len(failed)} of {len(webhooks)} webhooks as individual jobs")
+
+    return outcomes
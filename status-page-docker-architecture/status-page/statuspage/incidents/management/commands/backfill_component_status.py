@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from components.models import Component
+from incidents.models import ComponentDailyStatus
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily Component status rollup from the existing Incidents"
+
+    batch_size = 100
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help="Only rebuild the given number of most recent days (default: the whole history)"
+        )
+
+    def handle(self, *args, **options):
+        dates = None
+        if options['days']:
+            today = timezone.localdate()
+            dates = [today - timezone.timedelta(days=n) for n in range(options['days'])]
+
+        component_ids = list(Component.objects.values_list('pk', flat=True))
+        for offset in range(0, len(component_ids), self.batch_size):
+            ComponentDailyStatus.refresh(component_ids[offset:offset + self.batch_size], dates=dates)
+
+        self.stdout.write(f'Rebuilt the daily status of {len(component_ids)} components.', ending="\n")
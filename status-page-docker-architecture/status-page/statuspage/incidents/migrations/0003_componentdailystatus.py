@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0002_auto_20250904_0941'),
+        ('incidents', '0002_auto_20250904_0941'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentDailyStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('worst_impact', models.CharField(default='none', max_length=255)),
+                ('incident_count', models.PositiveIntegerField(default=0)),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_statuses', to='components.component')),
+            ],
+            options={
+                'verbose_name_plural': 'component daily statuses',
+                'ordering': ['component', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('component', 'date'), name='incidents_componentdailystatus_unique_component_date')],
+            },
+        ),
+    ]
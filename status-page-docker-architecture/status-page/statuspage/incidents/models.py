@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, Max, Value, When
+from django.db.models.functions import TruncDate
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -6,6 +8,7 @@ from django.contrib.auth.models import User
 from incidents.choices import *
 from components.models import Component
 from utilities.models import IncidentMaintenanceModel, IncidentMaintenanceUpdateModel
+from utilities.svg import invalidate_historic_status_svg
 
 
 class Incident(IncidentMaintenanceModel):
@@ -39,6 +42,13 @@ class Incident(IncidentMaintenanceModel):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored creation time, so a changed date can be rolled up for both days after saving
+        instance._previous_created = instance.__dict__.get('created')
+        return instance
+
     def get_absolute_url(self):
         return reverse('incidents:incident', args=[self.pk])
 
@@ -130,3 +140,88 @@ class IncidentTemplate(IncidentMaintenanceModel):
     def get_impact_text_color(self):
         (_, __, color) = IncidentImpactChoices.colors.get(self.impact)
         return color
+
+
+class ComponentDailyStatus(models.Model):
+    """
+    Daily rollup of the visible Incidents affecting a Component, used to render the historic status bars without
+    scanning all Incidents of the Component on every request.
+    """
+    component = models.ForeignKey(
+        to=Component,
+        on_delete=models.CASCADE,
+        related_name='daily_statuses',
+    )
+    date = models.DateField()
+    worst_impact = models.CharField(
+        max_length=255,
+        choices=IncidentImpactChoices,
+        default=IncidentImpactChoices.NONE,
+    )
+    incident_count = models.PositiveIntegerField(
+        default=0,
+    )
+
+    class Meta:
+        ordering = ['component', 'date']
+        constraints = (
+            models.UniqueConstraint(
+                fields=('component', 'date'),
+                name='%(app_label)s_%(class)s_unique_component_date'
+            ),
+        )
+        verbose_name_plural = 'component daily statuses'
+
+    def __str__(self):
+        return f'{self.component} - {self.date}'
+
+    @classmethod
+    def refresh(cls, component_ids, dates=None):
+        """
+        Recalculate the rollup rows of the given Components from their visible Incidents, limited to the given dates
+        (or all dates if None). Days without any Incidents are not stored.
+        """
+        component_ids = set(component_ids)
+        if dates is not None:
+            dates = set(dates)
+        if not component_ids or dates == set():
+            return
+
+        # Ordered from least to most severe
+        impacts = [
+            IncidentImpactChoices.NONE,
+            IncidentImpactChoices.MINOR,
+            IncidentImpactChoices.MAJOR,
+            IncidentImpactChoices.CRITICAL,
+        ]
+        statuses = Incident.components.through.objects.filter(
+            component_id__in=component_ids,
+            incident__visibility=True,
+        ).annotate(
+            date=TruncDate('incident__created'),
+        )
+        existing = cls.objects.filter(component_id__in=component_ids)
+        if dates is not None:
+            statuses = statuses.filter(date__in=dates)
+            existing = existing.filter(date__in=dates)
+
+        statuses = statuses.values('component_id', 'date').annotate(
+            incident_count=Count('incident_id'),
+            impact_rank=Max(Case(
+                *[When(incident__impact=impact, then=Value(rank)) for rank, impact in enumerate(impacts)],
+                default=Value(0),
+            )),
+        )
+
+        with transaction.atomic():
+            existing.delete()
+            cls.objects.bulk_create([
+                cls(
+                    component_id=status['component_id'],
+                    date=status['date'],
+                    worst_impact=impacts[status['impact_rank']],
+                    incident_count=status['incident_count'],
+                ) for status in statuses
+            ])
+
+        invalidate_historic_status_svg(component_ids)
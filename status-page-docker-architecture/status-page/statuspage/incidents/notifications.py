@@ -0,0 +1,60 @@
+from subscribers.notifications import (
+    Notification, get_notification_recipients, get_thread_headers, get_update_summary,
+)
+from .models import Incident, IncidentUpdate
+
+__all__ = (
+    'get_incident_created_notification',
+    'get_incident_updated_notification',
+)
+
+
+def get_incident_created_notification(incident_id):
+    """
+    Return the Notification about a new Incident for all eligible Subscribers, or None if the Incident no longer
+    exists.
+    """
+    incident = Incident.objects.filter(pk=incident_id).first()
+    if incident is None:
+        return None
+
+    update = incident.updates.first()
+    return Notification(
+        template='incidents/created',
+        context={
+            'incident': incident,
+            'update': update,
+            'components': list(incident.components.filter(visibility=True)),
+        },
+        subject=f'Incident - {incident.title}',
+        get_headers=get_thread_headers('incident', incident.id),
+        recipients=get_notification_recipients(incident.components.values_list('pk', flat=True)),
+        summary=get_update_summary(update),
+    )
+
+
+def get_incident_updated_notification(update_id):
+    """
+    Return the Notification about a new IncidentUpdate for all eligible Subscribers, or None if the IncidentUpdate
+    no longer exists.
+    """
+    update = IncidentUpdate.objects.select_related('incident').filter(pk=update_id).first()
+    if update is None:
+        return None
+
+    incident = update.incident
+    return Notification(
+        template='incidentupdates/created',
+        context={
+            'incident': incident,
+            'update': update,
+            'components': list(incident.components.filter(visibility=True)),
+        },
+        subject=f'Incident - {incident.title}',
+        # The thread of the notifications about the Incident and all of its updates, loaded once for all recipients
+        get_headers=get_thread_headers(
+            'incident', incident.id, update.id, reference_ids=incident.updates.values_list('pk', flat=True)
+        ),
+        recipients=get_notification_recipients(incident.components.values_list('pk', flat=True)),
+        summary=get_update_summary(update),
+    )
@@ -1,70 +1,88 @@
-import logging
-
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from incidents.models import Incident, IncidentUpdate
-from subscribers.models import Subscriber
-from utilities.utils import on_transaction_commit, get_mail_domain
+from incidents.models import ComponentDailyStatus, Incident, IncidentUpdate
+from statuspage.snapshot import invalidate_home_snapshot
+from subscribers.outbox import add_to_outbox
 
 
 @receiver(post_save, sender=Incident)
-@on_transaction_commit
 def send_incident_notifications(sender, instance: Incident, **kwargs):
-    logger = logging.getLogger('statuspage.incidents.signals')
     is_new = kwargs.get('created', False)
 
     if is_new and instance.visibility and instance.send_email:
-        subscribers = Subscriber.objects.filter(incident_subscriptions=True)
-        update = instance.updates.first()
-
-        for subscriber in subscribers:
-            try:
-                if subscriber.incident_notifications_subscribed_only and len(instance.components.filter(subscribers__in=[subscriber])) == 0:
-                    continue
-                subscriber.send_mail(subject=f'Incident - {instance.title}', template='incidents/created', context={
-                    'incident': instance,
-                    'update': update,
-                    'components': instance.components.filter(visibility=True),
-                }, headers={
-                    'Message-ID': f'<incident-{instance.id}-0-{subscriber.id}@{get_mail_domain()}>',
-                })
-            except Exception as e:
-                logger.error(e)
-                pass
+        add_to_outbox('incident_created', instance.pk)
 
 
 @receiver(post_save, sender=IncidentUpdate)
-@on_transaction_commit
 def send_incident_update_notifications(sender, instance: IncidentUpdate, **kwargs):
-    logger = logging.getLogger('statuspage.incidents.signals')
     is_new = kwargs.get('created', False)
     first_update = instance.created == instance.incident.created
 
     if is_new and instance.incident.visibility and instance.send_email and not first_update:
-        subscribers = Subscriber.objects.filter(incident_subscriptions=True)
-
-        for subscriber in subscribers:
-            message_id = f'<incident-{instance.incident.id}-{instance.id}-{subscriber.id}@{get_mail_domain()}>'
-            previous_message_ids = [
-                f'<incident-{instance.incident.id}-0-{subscriber.id}@{get_mail_domain()}>',
-                *list(map(
-                    lambda update: f'<incident-{instance.incident.id}-{update.id}-{subscriber.id}@{get_mail_domain()}>',
-                    instance.incident.updates.all()
-                ))
-            ]
-
-            try:
-                if subscriber.incident_notifications_subscribed_only and len(instance.incident.components.filter(subscribers__in=[subscriber])) == 0:
-                    continue
-                subscriber.send_mail(subject=f'Incident - {instance.incident.title}', template='incidentupdates/created', context={
-                    'incident': instance.incident,
-                    'update': instance,
-                    'components': instance.incident.components.filter(visibility=True),
-                }, headers={
-                    'Message-ID': message_id,
-                    'References': ' '.join(previous_message_ids),
-                })
-            except Exception as e:
-                logger.error(e)
-                pass
+        add_to_outbox('incident_updated', instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Incident)
+@receiver((post_save, post_delete), sender=IncidentUpdate)
+@receiver(m2m_changed, sender=Incident.components.through)
+def clear_home_snapshot(sender, **kwargs):
+    invalidate_home_snapshot()
+
+
+#
+# Component daily status rollup
+#
+
+def get_incident_dates(*created):
+    return {timezone.localtime(value).date() for value in created if value is not None}
+
+
+@receiver(post_save, sender=Incident)
+def update_component_daily_status(sender, instance: Incident, **kwargs):
+    if kwargs.get('created', False):
+        # Components are linked afterwards (see update_component_daily_status_m2m)
+        return
+    ComponentDailyStatus.refresh(
+        component_ids=instance.components.values_list('pk', flat=True),
+        dates=get_incident_dates(instance.created, getattr(instance, '_previous_created', None)),
+    )
+    instance._previous_created = instance.created
+
+
+@receiver(m2m_changed, sender=Incident.components.through)
+def update_component_daily_status_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Remember the links being cleared, as they are no longer available after clearing
+        if reverse:
+            instance._cleared_incident_ids = set(instance.incidents.values_list('pk', flat=True))
+        else:
+            instance._cleared_component_ids = set(instance.components.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_incident_ids' if reverse else '_cleared_component_ids', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        # Incidents have been (un)linked from a Component
+        ComponentDailyStatus.refresh(
+            component_ids=[instance.pk],
+            dates=get_incident_dates(*Incident.objects.filter(pk__in=pk_set).values_list('created', flat=True)),
+        )
+    else:
+        ComponentDailyStatus.refresh(component_ids=pk_set, dates=get_incident_dates(instance.created))
+
+
+@receiver(pre_delete, sender=Incident)
+def remember_incident_components(sender, instance: Incident, **kwargs):
+    instance._deleted_component_ids = set(instance.components.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Incident)
+def clear_component_daily_status(sender, instance: Incident, **kwargs):
+    ComponentDailyStatus.refresh(
+        component_ids=getattr(instance, '_deleted_component_ids', set()),
+        dates=get_incident_dates(instance.created),
+    )
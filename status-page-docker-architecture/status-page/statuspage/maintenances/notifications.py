@@ -0,0 +1,60 @@
+from subscribers.notifications import (
+    Notification, get_notification_recipients, get_thread_headers, get_update_summary,
+)
+from .models import Maintenance, MaintenanceUpdate
+
+__all__ = (
+    'get_maintenance_created_notification',
+    'get_maintenance_updated_notification',
+)
+
+
+def get_maintenance_created_notification(maintenance_id):
+    """
+    Return the Notification about a new Maintenance for all eligible Subscribers, or None if the Maintenance no longer
+    exists.
+    """
+    maintenance = Maintenance.objects.filter(pk=maintenance_id).first()
+    if maintenance is None:
+        return None
+
+    update = maintenance.updates.first()
+    return Notification(
+        template='maintenances/created',
+        context={
+            'maintenance': maintenance,
+            'update': update,
+            'components': list(maintenance.components.filter(visibility=True)),
+        },
+        subject=f'Maintenance - {maintenance.title}',
+        get_headers=get_thread_headers('maintenance', maintenance.id),
+        recipients=get_notification_recipients(maintenance.components.values_list('pk', flat=True)),
+        summary=get_update_summary(update),
+    )
+
+
+def get_maintenance_updated_notification(update_id):
+    """
+    Return the Notification about a new MaintenanceUpdate for all eligible Subscribers, or None if the MaintenanceUpdate
+    no longer exists.
+    """
+    update = MaintenanceUpdate.objects.select_related('maintenance').filter(pk=update_id).first()
+    if update is None:
+        return None
+
+    maintenance = update.maintenance
+    return Notification(
+        template='maintenanceupdates/created',
+        context={
+            'maintenance': maintenance,
+            'update': update,
+            'components': list(maintenance.components.filter(visibility=True)),
+        },
+        subject=f'Maintenance - {maintenance.title}',
+        # The thread of the notifications about the Maintenance and all of its updates, loaded once for all recipients
+        get_headers=get_thread_headers(
+            'maintenance', maintenance.id, update.id, reference_ids=maintenance.updates.values_list('pk', flat=True)
+        ),
+        recipients=get_notification_recipients(maintenance.components.values_list('pk', flat=True)),
+        summary=get_update_summary(update),
+    )
@@ -0,0 +1,54 @@
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+__all__ = (
+    'NDJSONParser',
+    'PlaintextProtocolParser',
+)
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parse newline delimited JSON into a list, one item per non-empty line.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(f"NDJSON parse error on line {number}: {e}")
+        return items
+
+
+class PlaintextProtocolParser(BaseParser):
+    """
+    Parse metric points in a Graphite-like plaintext protocol into a list of dicts. Each line holds the metric ID, the
+    value and an optional UNIX timestamp, separated by whitespace, e.g. "3 142.5 1735689600". Lines which cannot be
+    split this way are passed on as strings, so they are reported as rejected points.
+    """
+    media_type = 'text/plain'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        items = []
+        for line in stream:
+            line = line.decode(errors='replace').strip()
+            if not line:
+                continue
+            fields = line.split()
+            if len(fields) not in (2, 3) or not fields[0].isdigit():
+                items.append(line)
+                continue
+            items.append({
+                'metric': int(fields[0]),
+                'value': fields[1],
+                'timestamp': fields[2] if len(fields) == 3 else None,
+            })
+        return items
@@ -12,7 +12,7 @@ class MetricSerializer(StatusPageModelSerializer):
 
     class Meta:
         model = Metric
-        fields = ('id', 'url', 'title', 'suffix', 'visibility', 'order', 'expand', 'created', 'last_updated')
+        fields = ('id', 'url', 'title', 'suffix', 'visibility', 'order', 'expand', 'max_points', 'created', 'last_updated')
 
 
 class MetricPointSerializer(StatusPageModelSerializer):
@@ -1,3 +1,5 @@
+from django.urls import include, path
+
 from statuspage.api.routers import StatusPageRouter
 from . import views
 
@@ -9,4 +11,7 @@ router.register('metrics', views.MetricViewSet)
 router.register('metric-points', views.MetricPointViewSet)
 
 app_name = 'metrics-api'
-urlpatterns = router.urls
+urlpatterns = [
+    path('metric-points/ingest/', views.MetricPointIngestView.as_view(), name='metricpoint_ingest'),
+    path('', include(router.urls)),
+]
@@ -1,8 +1,15 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
 from rest_framework.routers import APIRootView
+from rest_framework.status import HTTP_201_CREATED, HTTP_202_ACCEPTED, HTTP_400_BAD_REQUEST
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
 from metrics.api import serializers
+from metrics.api.parsers import NDJSONParser, PlaintextProtocolParser
 from metrics import filtersets
+from metrics.ingestion import ingest_points
 from metrics.models import Metric, MetricPoint
 
 
@@ -24,3 +31,34 @@ class MetricPointViewSet(ModelViewSet):
     queryset = MetricPoint.objects.all()
     serializer_class = serializers.MetricPointSerializer
     filterset_class = filtersets.MetricPointFilterSet
+
+
+class MetricPointIngestView(APIView):
+    """
+    Create many MetricPoints at once from a JSON array or NDJSON of {"metric": <id>, "value": <number>, "timestamp":
+    <UNIX time or ISO 8601, optional>} objects, or from plaintext lines of "<metric id> <value> [<UNIX time>]".
+    Points are validated individually and written in bulk, without change records or webhooks. With
+    METRIC_WRITE_BEHIND enabled, the points are buffered and written by a background job (202 Accepted).
+    """
+    queryset = MetricPoint.objects.none()
+    parser_classes = [JSONParser, NDJSONParser, PlaintextProtocolParser]
+
+    def post(self, request):
+        points = request.data
+        if not isinstance(points, list):
+            raise ParseError("Expected a list of metric points")
+
+        accepted, rejected, errors, buffered = ingest_points(points)
+
+        if buffered:
+            status = HTTP_202_ACCEPTED
+        elif accepted or not rejected:
+            status = HTTP_201_CREATED
+        else:
+            status = HTTP_400_BAD_REQUEST
+
+        return Response({
+            'accepted': accepted,
+            'rejected': rejected,
+            'errors': [{'index': index, 'error': error} for index, error in errors],
+        }, status=status)
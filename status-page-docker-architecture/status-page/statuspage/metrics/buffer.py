@@ -0,0 +1,147 @@
+import datetime
+import json
+import logging
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from statuspage.config import get_config
+from .models import Metric
+
+__all__ = (
+    'buffer_points',
+    'flush_buffer',
+    'get_buffered_points',
+)
+
+METRIC_BUFFER_KEY = 'metric_point_buffer'
+METRIC_BUFFER_METRICS_KEY = f'{METRIC_BUFFER_KEY}_metrics'
+METRIC_BUFFER_SIZE_KEY = f'{METRIC_BUFFER_KEY}_size'
+METRIC_BUFFER_SEQUENCE_KEY = f'{METRIC_BUFFER_KEY}_sequence'
+METRIC_BUFFER_FLUSH_LOCK_TIMEOUT = 300
+METRIC_BUFFER_FLUSH_BATCH_SIZE = 10000
+
+# Add points to the per-Metric sorted sets (KEYS[4:]), scored by their timestamp, unless the buffers would then hold
+# more than ARGV[1] points. ARGV[2] is the number of points, followed by the ID and number of points of each Metric
+# and the (timestamp, entry) pairs of its points. Members are prefixed with a sequence number, so equal points are
+# kept apart. Returns 1 if the points have been buffered, or 0.
+BUFFER_POINTS_SCRIPT = """
+local total = tonumber(ARGV[2])
+if tonumber(redis.call('GET', KEYS[1]) or 0) + total > tonumber(ARGV[1]) then
+    return 0
+end
+
+local sequence = redis.call('INCRBY', KEYS[3], total) - total
+local index = 3
+for key = 4, #KEYS do
+    local metric_id = ARGV[index]
+    local count = tonumber(ARGV[index + 1])
+    index = index + 2
+    local args = {}
+    for point = 1, count do
+        sequence = sequence + 1
+        args[#args + 1] = ARGV[index]
+        args[#args + 1] = sequence .. ':' .. ARGV[index + 1]
+        index = index + 2
+        -- Stay well below the maximum number of arguments of a call
+        if #args >= 2000 or point == count then
+            redis.call('ZADD', KEYS[key], unpack(args))
+            args = {}
+        end
+    end
+    redis.call('SADD', KEYS[2], metric_id)
+end
+
+redis.call('INCRBY', KEYS[1], total)
+return 1
+"""
+
+logger = logging.getLogger('statuspage.metrics.buffer')
+
+
+def _get_key(metric_id):
+    return f'{METRIC_BUFFER_KEY}_{metric_id}'
+
+
+def _parse_entry(member):
+    # Strip the sequence number
+    value, timestamp = json.loads(member.split(b':', 1)[1])
+    return value, datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+
+
+def buffer_points(points):
+    """
+    Add (metric_id, value, timestamp) tuples to the per-Metric Redis buffers, from which they are written to the
+    database by `flush_buffer()`. Returns False without buffering anything if the buffers would then hold more than
+    METRIC_BUFFER_MAX_POINTS points; the check and the insertion are atomic.
+    """
+    if not points:
+        return True
+
+    entries = {}
+    for metric_id, value, timestamp in points:
+        timestamp = timestamp.timestamp()
+        entries.setdefault(metric_id, []).extend((repr(timestamp), json.dumps((value, timestamp))))
+
+    args = [get_config().METRIC_BUFFER_MAX_POINTS, len(points)]
+    for metric_id, metric_entries in entries.items():
+        args.extend((metric_id, len(metric_entries) // 2, *metric_entries))
+
+    redis = get_redis_connection('default')
+    script = redis.register_script(BUFFER_POINTS_SCRIPT)
+    keys = [METRIC_BUFFER_SIZE_KEY, METRIC_BUFFER_METRICS_KEY, METRIC_BUFFER_SEQUENCE_KEY]
+    return bool(script(keys=keys + [_get_key(metric_id) for metric_id in entries], args=args))
+
+
+def get_buffered_points(metric_id, start, end):
+    """
+    Return the buffered (timestamp, value) tuples of a Metric between `start` and `end`, ordered by time.
+    """
+    redis = get_redis_connection('default')
+    points = []
+    for member in redis.zrangebyscore(_get_key(metric_id), start.timestamp(), end.timestamp()):
+        value, timestamp = _parse_entry(member)
+        points.append((timestamp, value))
+
+    return points
+
+
+def flush_buffer():
+    """
+    Write the buffered points of all Metrics to the database in batches. Points are only removed from the buffer
+    after they have been written, so a failed flush is retried by the next run. Points of deleted Metrics are
+    discarded.
+    """
+    if not cache.add(f'{METRIC_BUFFER_KEY}_lock', True, METRIC_BUFFER_FLUSH_LOCK_TIMEOUT):
+        logger.debug("Skipping metric buffer flush; another flush is running")
+        return
+
+    from .ingestion import write_points
+
+    try:
+        redis = get_redis_connection('default')
+        metric_ids = {int(metric_id) for metric_id in redis.smembers(METRIC_BUFFER_METRICS_KEY)}
+        existing = set(Metric.objects.filter(pk__in=metric_ids).values_list('pk', flat=True))
+
+        for metric_id in metric_ids:
+            key = _get_key(metric_id)
+            # Points may be added anywhere in the sorted set meanwhile, so the written ones are removed by member
+            while members := redis.zrange(key, 0, METRIC_BUFFER_FLUSH_BATCH_SIZE - 1):
+                if metric_id in existing:
+                    points = []
+                    for member in members:
+                        value, timestamp = _parse_entry(member)
+                        points.append((metric_id, value, timestamp))
+                    write_points(points)
+
+                with redis.pipeline() as pipeline:
+                    pipeline.zrem(key, *members)
+                    pipeline.decrby(METRIC_BUFFER_SIZE_KEY, len(members))
+                    pipeline.execute()
+
+            redis.srem(METRIC_BUFFER_METRICS_KEY, metric_id)
+            # Points may have been buffered since the sorted set was drained; keep the Metric registered for the next run
+            if redis.exists(key):
+                redis.sadd(METRIC_BUFFER_METRICS_KEY, metric_id)
+    finally:
+        cache.delete(f'{METRIC_BUFFER_KEY}_lock')
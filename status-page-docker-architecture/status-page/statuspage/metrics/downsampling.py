@@ -0,0 +1,45 @@
+import numpy as np
+
+__all__ = (
+    'lttb',
+)
+
+
+def lttb(x, y, threshold):
+    """
+    Select `threshold` points of a series with the Largest-Triangle-Three-Buckets algorithm, which keeps the visual
+    shape (peaks and dips) of the series. Returns the indices of the selected points in ascending order.
+    :param x: The (ascending) x values of the series, e.g. timestamps
+    :param y: The y values of the series
+    :param threshold: The number of points to keep
+    """
+    length = len(x)
+    if threshold < 3 or length <= threshold:
+        return np.arange(length)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # The first and last point are always kept; the points in between are split into threshold - 2 buckets
+    edges = np.linspace(1, length - 1, threshold - 1).astype(int)
+    counts = np.diff(edges)
+    x_sums = np.cumsum(np.concatenate(([0.0], x)))
+    y_sums = np.cumsum(np.concatenate(([0.0], y)))
+    x_means = (x_sums[edges[1:]] - x_sums[edges[:-1]]) / counts
+    y_means = (y_sums[edges[1:]] - y_sums[edges[:-1]]) / counts
+    # The last bucket is compared against the last point instead of the average of a following bucket
+    x_means = np.append(x_means[1:], x[-1])
+    y_means = np.append(y_means[1:], y[-1])
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = length - 1
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        a = indices[bucket]
+        areas = np.abs(
+            (x[a] - x_means[bucket]) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (y_means[bucket] - y[a])
+        )
+        indices[bucket + 1] = start + np.argmax(areas)
+
+    return indices
@@ -8,7 +8,7 @@ from statuspage.filtersets import StatusPageModelFilterSet
 class MetricFilterSet(StatusPageModelFilterSet):
     class Meta:
         model = Metric
-        fields = ['id', 'title', 'suffix', 'visibility', 'order', 'expand']
+        fields = ['id', 'title', 'suffix', 'visibility', 'order', 'expand', 'max_points']
 
     def search(self, queryset, name, value):
         if not value.strip():
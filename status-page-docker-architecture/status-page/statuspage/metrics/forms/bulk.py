@@ -24,9 +24,14 @@ class MetricBulkEditForm(StatusPageModelBulkEditForm):
         required=False,
         widget=StaticSelect(),
     )
+    max_points = forms.IntegerField(
+        required=False,
+        min_value=0,
+        label='Maximum chart points',
+    )
 
     model = Metric
     fieldsets = (
-        ('Metric', ('visibility', 'order', 'expand')),
+        ('Metric', ('visibility', 'order', 'expand', 'max_points')),
     )
     nullable_fields = ()
@@ -10,14 +10,14 @@ __all__ = (
 class MetricForm(StatusPageModelForm):
     fieldsets = (
         ('Metric', (
-            'title', 'suffix', 'visibility', 'order', 'expand'
+            'title', 'suffix', 'visibility', 'order', 'expand', 'max_points'
         )),
     )
 
     class Meta:
         model = Metric
         fields = (
-            'title', 'suffix', 'visibility', 'order', 'expand'
+            'title', 'suffix', 'visibility', 'order', 'expand', 'max_points'
         )
         widgets = {
             'expand': StaticSelect(),
@@ -0,0 +1,153 @@
+import csv
+import datetime
+import io
+import math
+
+import django_rq
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from statuspage.config import get_config
+from utilities.rqworker import get_queue_for_model
+from .buffer import buffer_points
+from .models import Metric, MetricMinuteRollup, MetricPoint, MetricRollup
+
+__all__ = (
+    'ingest_points',
+    'recalculate_rollups',
+    'submit_points',
+    'validate_points',
+    'write_points',
+)
+
+# Number of rejected points which are reported individually
+MAX_REPORTED_ERRORS = 100
+
+
+def _parse_timestamp(value, now):
+    if value is None or value == '':
+        return now
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.fromtimestamp(float(value), tz=datetime.timezone.utc)
+        except ValueError:
+            pass
+        timestamp = parse_datetime(value)
+        if timestamp is not None:
+            return timestamp if timezone.is_aware(timestamp) else timezone.make_aware(timestamp)
+    raise ValueError(f"Invalid timestamp: {value!r}")
+
+
+def validate_points(points):
+    """
+    Validate a sequence of points, given as dicts with the keys "metric" (the Metric ID), "value" and an optional
+    "timestamp" (UNIX time or ISO 8601, defaulting to the current time). All referenced Metrics are looked up with a
+    single query. Points from before the rollups' recalculation cutoff are rejected, as they could not be aggregated
+    correctly. Returns a list of valid (metric_id, value, timestamp) tuples and a list of (index, error) tuples.
+    """
+    now = timezone.now()
+    cutoff = MetricRollup.get_recalculation_cutoff(now)
+    valid, errors = [], []
+
+    metric_ids = set()
+    for point in points:
+        if isinstance(point, dict) and type(point.get('metric')) is int:
+            metric_ids.add(point['metric'])
+    metric_ids = set(Metric.objects.filter(pk__in=metric_ids).values_list('pk', flat=True))
+
+    for index, point in enumerate(points):
+        try:
+            if isinstance(point, str):
+                raise ValueError(f"Invalid line: {point!r}")
+            if not isinstance(point, dict):
+                raise ValueError("Expected an object")
+            # Booleans and floats compare equal to integers, but cannot be written as Metric IDs
+            if type(point.get('metric')) is not int or point['metric'] not in metric_ids:
+                raise ValueError(f"Unknown metric: {point.get('metric')!r}")
+            if isinstance(point.get('value'), bool):
+                raise ValueError(f"Invalid value: {point['value']!r}")
+            try:
+                value = float(point.get('value'))
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value: {point.get('value')!r}")
+            if not math.isfinite(value):
+                raise ValueError(f"Invalid value: {point.get('value')!r}")
+            timestamp = _parse_timestamp(point.get('timestamp'), now)
+            if cutoff is not None and timestamp < cutoff:
+                raise ValueError(f"Timestamp outside the retention period: {point.get('timestamp')!r}")
+        except (ValueError, OverflowError, OSError) as e:
+            errors.append((index, str(e)))
+        else:
+            valid.append((point['metric'], value, timestamp))
+
+    return valid, errors
+
+
+def write_points(points):
+    """
+    Insert (metric_id, value, timestamp) tuples into the MetricPoint table with a single COPY statement. This bypasses
+    the model's signals, so no change records or webhooks are generated for the points. Rollups of buckets which have
+    already been aggregated are recalculated by a background job once the points have been committed.
+    """
+    if not points:
+        return
+
+    now = timezone.now()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for metric_id, value, timestamp in points:
+        writer.writerow((metric_id, repr(value), timestamp.isoformat(), now.isoformat()))
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(MetricPoint._meta.db_table)} (metric_id, value, created, last_updated) "
+            f"FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    # Points older than the rollup watermark would otherwise never be aggregated
+    earliest = min(timestamp for _, _, timestamp in points)
+    watermark = MetricMinuteRollup.objects.aggregate(watermark=Max('bucket'))['watermark']
+    if watermark is not None and earliest < watermark:
+        end = min(max(timestamp for _, _, timestamp in points), watermark)
+        transaction.on_commit(lambda: _enqueue_recalculation(earliest, end), robust=True)
+
+
+def _enqueue_recalculation(start, end):
+    django_rq.get_queue(get_queue_for_model('metric')).enqueue(recalculate_rollups, start, end)
+
+
+def recalculate_rollups(start, end):
+    """
+    Background job recalculating the buckets of all rollup levels between `start` and `end`.
+    """
+    MetricRollup.aggregate_range(start, end)
+
+
+def submit_points(points):
+    """
+    Store (metric_id, value, timestamp) tuples through the Redis buffer if METRIC_WRITE_BEHIND is enabled, returning
+    True if the points were buffered. If the buffer is full, the points are written to the database immediately,
+    which slows the submitting client down instead of growing the buffer further.
+    """
+    if get_config().METRIC_WRITE_BEHIND and buffer_points(points):
+        return True
+    write_points(points)
+    return False
+
+
+def ingest_points(points):
+    """
+    Validate and store a sequence of points (see `validate_points()`). Returns the number of accepted and rejected
+    points, a list of (index, error) tuples of up to MAX_REPORTED_ERRORS rejected points and whether the accepted
+    points were buffered.
+    """
+    valid, errors = validate_points(points)
+    buffered = submit_points(valid)
+
+    return len(valid), len(errors), errors[:MAX_REPORTED_ERRORS], buffered
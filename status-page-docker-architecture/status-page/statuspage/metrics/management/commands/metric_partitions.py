@@ -0,0 +1,43 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from metrics.partitions import PARTITION_INTERVALS, convert_to_partitioned, create_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Create the upcoming partitions of the partitioned metric point table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=7,
+            help="Number of future days or months to create partitions for (default: 7)"
+        )
+        parser.add_argument(
+            '--convert', action='store_true',
+            help="Convert the existing metric point table into the partitioned layout first"
+        )
+
+    def handle(self, *args, **options):
+        interval = settings.METRIC_PARTITIONING
+        if interval not in PARTITION_INTERVALS:
+            raise CommandError(f"METRIC_PARTITIONING must be one of: {', '.join(PARTITION_INTERVALS)}")
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioning requires PostgreSQL")
+        if options['ahead'] < 0:
+            raise CommandError("--ahead must not be negative")
+
+        if not is_partitioned():
+            if not options['convert']:
+                raise CommandError("The metric point table is not partitioned; run this command with --convert")
+            self.stdout.write("Converting the metric point table...", ending="\n")
+            convert_to_partitioned(interval)
+
+        today = timezone.now().date()
+        days = options['ahead'] * (31 if interval == 'monthly' else 1)
+        created = create_partitions(interval, today, today + datetime.timedelta(days=days))
+
+        self.stdout.write(f'Created {len(created)} partitions.', ending="\n")
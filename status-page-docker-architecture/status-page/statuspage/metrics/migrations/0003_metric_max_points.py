@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0002_auto_20250904_0941'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metric',
+            name='max_points',
+            field=models.PositiveIntegerField(default=500),
+        ),
+    ]
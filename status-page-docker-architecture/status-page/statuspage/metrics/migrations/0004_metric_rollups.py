@@ -0,0 +1,68 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0003_metric_max_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricDayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('min', models.FloatField()),
+                ('max', models.FloatField()),
+                ('sum', models.FloatField()),
+                ('last', models.FloatField()),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='metrics.metric')),
+            ],
+            options={
+                'ordering': ['metric', 'bucket'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('metric', 'bucket'), name='metrics_metricdayrollup_unique_metric_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricHourRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('min', models.FloatField()),
+                ('max', models.FloatField()),
+                ('sum', models.FloatField()),
+                ('last', models.FloatField()),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='metrics.metric')),
+            ],
+            options={
+                'ordering': ['metric', 'bucket'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('metric', 'bucket'), name='metrics_metrichourrollup_unique_metric_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricMinuteRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('min', models.FloatField()),
+                ('max', models.FloatField()),
+                ('sum', models.FloatField()),
+                ('last', models.FloatField()),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='metrics.metric')),
+            ],
+            options={
+                'ordering': ['metric', 'bucket'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('metric', 'bucket'), name='metrics_metricminuterollup_unique_metric_bucket')],
+            },
+        ),
+    ]
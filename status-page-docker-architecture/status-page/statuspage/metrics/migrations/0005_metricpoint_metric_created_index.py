@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0004_metric_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='metricpoint',
+            index=models.Index(fields=['metric', 'created'], name='metrics_met_metric__11968e_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 01:10
+
+import metrics.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0005_metricpoint_metric_created_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='metric',
+            name='max_points',
+            field=models.PositiveIntegerField(default=500, validators=[metrics.models.validate_max_points]),
+        ),
+    ]
@@ -1,13 +1,32 @@
+import datetime
+import heapq
+
+import numpy as np
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields.array import IndexTransform
+from django.core.exceptions import ValidationError
 from django.db import models
-from django.template import Context, Template
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 
 from statuspage.models import StatusPageModel
+from utilities.utils import format_datetimes
+from .downsampling import lttb
 from django.urls import reverse
 from .choices import *
 import json
 
 
+def validate_max_points(value):
+    """
+    Downsampling keeps the first and last point and at least one in between, so it needs a threshold of three points.
+    """
+    if 0 < value < 3:
+        raise ValidationError("Charts must keep at least 3 points (or 0 to disable downsampling).")
+
+
 class Metric(StatusPageModel):
     title = models.CharField(
         max_length=255
@@ -26,6 +45,13 @@ class Metric(StatusPageModel):
         choices=MetricExpandChoices,
         default=MetricExpandChoices.ON_CLICK,
     )
+    max_points = models.PositiveIntegerField(
+        default=500,
+        validators=[validate_max_points],
+        verbose_name='Maximum chart points',
+        help_text='Charts with more points are downsampled to this number of points, at least 3 (set to zero to '
+                  'disable)',
+    )
 
     class Meta:
         ordering = ['order', 'pk']
@@ -37,22 +63,63 @@ class Metric(StatusPageModel):
         return reverse('metrics:metric', args=[self.pk])
 
     def get_metric_data(self, now, range):
-        return self.points.filter(created__range=(range, now))
-
-    def get_metric_labels_json(self, now, range):
-        labels = []
-        for point in self.get_metric_data(now=now, range=range):
-            template = Template('{{ point.created }}')
-            context = Context()
-            context.update({'point': point})
-            labels.append(template.render(context))
-        return mark_safe(json.dumps(labels))
-
-    def get_metric_points_json(self, now, range):
-        points = []
-        for point in self.get_metric_data(now=now, range=range):
-            points.append(point.value)
-        return mark_safe(json.dumps(points))
+        return self.points.filter(created__range=(range, now)).order_by('created')
+
+    def get_metric_series(self, now, range):
+        """
+        Return (time, value) pairs of the given range. Ranges of a day or longer are read from the rollups, using the
+        average value of each bucket: of the rollups retained for the whole range, the coarsest one which still
+        provides `max_points` buckets is used (or the finest one if none does). Shorter ranges use the raw points.
+        Points still held in the write-behind buffer are included.
+        """
+        from statuspage.config import get_config
+        from .buffer import get_buffered_points
+
+        # Points which have not been written to the database yet
+        buffered = get_buffered_points(self.pk, range, now) if get_config().METRIC_WRITE_BEHIND else []
+
+        if now - range < datetime.timedelta(days=1):
+            series = self.get_metric_data(now=now, range=range).values_list('created', 'value')
+            return list(heapq.merge(series, buffered, key=lambda point: point[0]))
+
+        candidates = [
+            model for model in METRIC_ROLLUP_MODELS
+            if not model.get_retention() or timezone.now() - datetime.timedelta(days=model.get_retention()) <= range
+        ] or [METRIC_ROLLUP_MODELS[-1]]
+        rollup_model = candidates[0]
+        for model in candidates[1:]:
+            if self.max_points and (now - range) / model.interval >= self.max_points:
+                rollup_model = model
+
+        buckets = {
+            bucket: [total, count] for bucket, total, count in rollup_model.objects.filter(
+                metric=self, bucket__range=(range, now)
+            ).values_list('bucket', 'sum', 'count')
+        }
+        for timestamp, value in buffered:
+            bucket = buckets.setdefault(rollup_model.get_bucket_start(timestamp), [0, 0])
+            bucket[0] += value
+            bucket[1] += 1
+
+        return [(bucket, total / count) for bucket, (total, count) in sorted(buckets.items())]
+
+    def get_metric_json(self, now, range):
+        """
+        Return the labels (formatted creation times) and values of the series of the given range as a pair of JSON
+        arrays, reading the series with a single query. Ranges with more than `max_points` points are downsampled.
+        """
+        created, values = [], []
+        for point_created, point_value in self.get_metric_series(now=now, range=range):
+            created.append(point_created)
+            values.append(point_value)
+
+        if self.max_points and len(values) > self.max_points:
+            timestamps = np.fromiter((value.timestamp() for value in created), dtype=float, count=len(created))
+            indices = lttb(timestamps, values, self.max_points)
+            created = [created[index] for index in indices]
+            values = [values[index] for index in indices]
+
+        return mark_safe(json.dumps(format_datetimes(created))), mark_safe(json.dumps(values))
 
     @property
     def should_expand(self):
@@ -71,9 +138,212 @@ class MetricPoint(StatusPageModel):
 
     class Meta:
         ordering = ['pk']
+        indexes = (
+            models.Index(fields=('metric', 'created')),
+        )
 
     def __str__(self):
         return f'{self.value}'
 
     def get_absolute_url(self):
         return reverse('metrics:metric', args=[self.pk])
+
+
+class MetricRollup(models.Model):
+    """
+    Aggregated MetricPoints of a fixed time interval (bucket). Rollups are maintained incrementally by
+    `MetricRollup.aggregate_all()`, each level being aggregated from the next finer one.
+    """
+    metric = models.ForeignKey(
+        to=Metric,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    bucket = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    min = models.FloatField()
+    max = models.FloatField()
+    sum = models.FloatField()
+    last = models.FloatField()
+
+    # The truncation kind and length of a bucket
+    precision = None
+    interval = None
+    # The configuration parameter holding the retention period in days
+    retention_param = None
+
+    class Meta:
+        abstract = True
+        ordering = ['metric', 'bucket']
+        constraints = (
+            models.UniqueConstraint(
+                fields=('metric', 'bucket'),
+                name='%(app_label)s_%(class)s_unique_metric_bucket'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.metric} - {self.bucket}'
+
+    @classmethod
+    def get_retention(cls):
+        from statuspage.config import get_config
+        return getattr(get_config(), cls.retention_param)
+
+    @classmethod
+    def get_source(cls):
+        """
+        Return the queryset the rollups are aggregated from, its time field and the aggregates of the rollup fields.
+        """
+        source = METRIC_ROLLUP_MODELS[METRIC_ROLLUP_MODELS.index(cls) - 1]
+        return source.objects.all(), 'bucket', {
+            'count': Sum('count'),
+            'min': Min('min'),
+            'max': Max('max'),
+            'sum': Sum('sum'),
+            'last': IndexTransform(1, models.FloatField(), ArrayAgg('last', ordering='-bucket')),
+        }
+
+    @classmethod
+    def aggregate(cls, start, end):
+        """
+        (Re)calculate the buckets of the source data between `start` (inclusive) and `end` (exclusive). `start` must be
+        the beginning of a bucket.
+        """
+        queryset, field, aggregates = cls.get_source()
+        rows = queryset.filter(**{
+            f'{field}__gte': start,
+            f'{field}__lt': end,
+        }).annotate(
+            rollup_bucket=Trunc(field, cls.precision, tzinfo=datetime.timezone.utc),
+        ).values('metric_id', 'rollup_bucket').annotate(**aggregates).order_by()
+
+        cls.objects.bulk_create(
+            [cls(metric_id=row.pop('metric_id'), bucket=row.pop('rollup_bucket'), **row) for row in rows],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=('metric', 'bucket'),
+            update_fields=('count', 'min', 'max', 'sum', 'last'),
+        )
+
+    @classmethod
+    def get_bucket_start(cls, value):
+        """
+        Return the beginning of the bucket containing the given datetime.
+        """
+        start = value.astimezone(datetime.timezone.utc).replace(second=0, microsecond=0)
+        if cls.precision in ('hour', 'day'):
+            start = start.replace(minute=0)
+        if cls.precision == 'day':
+            start = start.replace(hour=0)
+        return start
+
+    @classmethod
+    def aggregate_chunked(cls, start, end):
+        """
+        Like `aggregate()`, but processing large ranges one day at a time.
+        """
+        while start < end:
+            chunk_end = min(start + datetime.timedelta(days=1), end)
+            cls.aggregate(start, chunk_end)
+            start = chunk_end
+
+    @classmethod
+    def aggregate_since_watermark(cls, now=None):
+        """
+        Aggregate the source data from the beginning of the most recent bucket (the watermark, which may have been
+        incomplete when it was calculated) up to `now`. Without any existing rollups, aggregation starts at the oldest
+        source data.
+        """
+        queryset, field, _ = cls.get_source()
+        watermark = cls.objects.aggregate(watermark=Max('bucket'))['watermark']
+        if watermark is None:
+            watermark = queryset.aggregate(watermark=Min(field))['watermark']
+            if watermark is None:
+                return
+
+        cls.aggregate_chunked(cls.get_bucket_start(watermark), now or timezone.now())
+
+    @classmethod
+    def aggregate_range(cls, start, end):
+        """
+        Recalculate the buckets of all rollup levels containing the times between `start` and `end`, e.g. after
+        points have been added to buckets which were already aggregated.
+        """
+        for model in METRIC_ROLLUP_MODELS:
+            model.aggregate_chunked(model.get_bucket_start(start), model.get_bucket_start(end) + model.interval)
+
+    @classmethod
+    def get_recalculation_cutoff(cls, now=None):
+        """
+        Return the earliest time from which the buckets of all rollup levels can be recalculated, as their source data
+        is retained completely, or None if all source data is retained indefinitely.
+        """
+        from statuspage.config import get_config
+        now = now or timezone.now()
+        cutoff = None
+        for index, model in enumerate(METRIC_ROLLUP_MODELS):
+            if index:
+                retention = METRIC_ROLLUP_MODELS[index - 1].get_retention()
+            else:
+                retention = get_config().METRIC_RETENTION
+            if retention:
+                # The bucket containing the beginning of the retention period lacks some of its source data
+                start = model.get_bucket_start(now - datetime.timedelta(days=retention)) + model.interval
+                cutoff = start if cutoff is None else max(cutoff, start)
+        return cutoff
+
+    @classmethod
+    def aggregate_all(cls, now=None):
+        """
+        Bring all rollup levels up to date, from the finest to the coarsest.
+        """
+        for model in METRIC_ROLLUP_MODELS:
+            model.aggregate_since_watermark(now=now)
+
+    @classmethod
+    def delete_expired(cls):
+        retention = cls.get_retention()
+        if retention:
+            cls.objects.filter(bucket__lt=timezone.now() - datetime.timedelta(days=retention)).delete()
+
+
+class MetricMinuteRollup(MetricRollup):
+    precision = 'minute'
+    interval = datetime.timedelta(minutes=1)
+    retention_param = 'METRIC_MINUTE_ROLLUP_RETENTION'
+
+    class Meta(MetricRollup.Meta):
+        pass
+
+    @classmethod
+    def get_source(cls):
+        return MetricPoint.objects.all(), 'created', {
+            'count': Count('pk'),
+            'min': Min('value'),
+            'max': Max('value'),
+            'sum': Sum('value'),
+            'last': IndexTransform(1, models.FloatField(), ArrayAgg('value', ordering='-created')),
+        }
+
+
+class MetricHourRollup(MetricRollup):
+    precision = 'hour'
+    interval = datetime.timedelta(hours=1)
+    retention_param = 'METRIC_HOUR_ROLLUP_RETENTION'
+
+    class Meta(MetricRollup.Meta):
+        pass
+
+
+class MetricDayRollup(MetricRollup):
+    precision = 'day'
+    interval = datetime.timedelta(days=1)
+    retention_param = 'METRIC_DAY_ROLLUP_RETENTION'
+
+    class Meta(MetricRollup.Meta):
+        pass
+
+
+# Ordered from the finest to the coarsest interval
+METRIC_ROLLUP_MODELS = (MetricMinuteRollup, MetricHourRollup, MetricDayRollup)
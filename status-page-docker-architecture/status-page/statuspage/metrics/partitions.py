@@ -0,0 +1,202 @@
+import datetime
+import logging
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import MetricPoint
+
+__all__ = (
+    'PARTITION_INTERVALS',
+    'convert_to_partitioned',
+    'create_partitions',
+    'drop_expired_partitions',
+    'get_partitions',
+    'is_partitioned',
+)
+
+PARTITION_INTERVALS = ('daily', 'monthly')
+
+logger = logging.getLogger('statuspage.metrics.partitions')
+
+
+def _table():
+    return MetricPoint._meta.db_table
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _get_period_start(date, interval):
+    if interval == 'monthly':
+        return date.replace(day=1)
+    return date
+
+
+def _get_next_period(start, interval):
+    if interval == 'monthly':
+        return (start + datetime.timedelta(days=32)).replace(day=1)
+    return start + datetime.timedelta(days=1)
+
+
+def _get_partition_name(start, interval):
+    return f'{_table()}_p{start:%Y%m}' if interval == 'monthly' else f'{_table()}_p{start:%Y%m%d}'
+
+
+def is_partitioned():
+    """
+    Return True if the MetricPoint table uses the range partitioned layout.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [_table()]
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions():
+    """
+    Return a list of (name, start, end) tuples of the date range partitions of the MetricPoint table, ordered by
+    start date. The default partition is not included.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+            [_table()]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    prefix = f'{_table()}_p'
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        suffix = name[len(prefix):]
+        interval = 'monthly' if len(suffix) == 6 else 'daily'
+        start = datetime.datetime.strptime(suffix, '%Y%m' if interval == 'monthly' else '%Y%m%d').date()
+        partitions.append((name, start, _get_next_period(start, interval)))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(interval, start, end):
+    """
+    Create the missing partitions of the given interval ("daily" or "monthly") covering the dates from `start` to
+    `end`. Rows of the new ranges which were stored in the default partition are moved to the new partitions. Returns
+    the names of the created partitions.
+    """
+    table = _table()
+    default = f'{table}_default'
+    existing = {name for name, _, _ in get_partitions()}
+    created = []
+
+    period = _get_period_start(start, interval)
+    while period <= end:
+        next_period = _get_next_period(period, interval)
+        name = _get_partition_name(period, interval)
+        if name not in existing:
+            bounds = [period.isoformat(), next_period.isoformat()]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE metricpoint_moved AS SELECT * FROM {_quote(default)} "
+                    f"WHERE created >= %s AND created < %s",
+                    bounds
+                )
+                cursor.execute(f"DELETE FROM {_quote(default)} WHERE created >= %s AND created < %s", bounds)
+                cursor.execute(
+                    f"CREATE TABLE {_quote(name)} PARTITION OF {_quote(table)} FOR VALUES FROM (%s) TO (%s)",
+                    bounds
+                )
+                cursor.execute(f"INSERT INTO {_quote(table)} SELECT * FROM metricpoint_moved")
+                cursor.execute("DROP TABLE metricpoint_moved")
+            created.append(name)
+            logger.debug(f"Created partition {name}")
+        period = next_period
+
+    return created
+
+
+def drop_expired_partitions(cutoff):
+    """
+    Drop all partitions which only contain rows created before `cutoff`. Returns the names of the dropped partitions.
+    """
+    dropped = []
+    with connection.cursor() as cursor:
+        for name, start, end in get_partitions():
+            if datetime.datetime.combine(end, datetime.time(), tzinfo=datetime.timezone.utc) <= cutoff:
+                cursor.execute(f"DROP TABLE {_quote(name)}")
+                dropped.append(name)
+                logger.debug(f"Dropped partition {name}")
+
+    return dropped
+
+
+def convert_to_partitioned(interval):
+    """
+    Convert the MetricPoint table into a table partitioned by the creation time, with partitions of the given interval
+    covering the existing rows up to today, plus a default partition. The primary key becomes
+    (id, created), as PostgreSQL requires the partition key to be part of it.
+    """
+    table = _table()
+    old_table = f'{table}_unpartitioned'
+    sequence = f'{table}_id_seq'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE")
+
+        # Remember the secondary indexes and foreign keys, which are recreated on the partitioned table
+        cursor.execute(
+            "SELECT i.indexname, i.indexdef FROM pg_indexes i "
+            "WHERE i.tablename = %s AND i.schemaname = current_schema() AND i.indexname NOT IN ("
+            "  SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p')",
+            [table, table]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass "
+            "AND contype = 'f'",
+            [table]
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"SELECT MIN(created)::date, COALESCE(MAX(id), 0) FROM {_quote(table)}")
+        first_date, last_id = cursor.fetchone()
+        cursor.execute(
+            "SELECT attidentity <> '', pg_get_serial_sequence(%s, 'id') FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attname = 'id'",
+            [table, table]
+        )
+        identity, old_sequence = cursor.fetchone()
+
+        cursor.execute(f"ALTER TABLE {_quote(table)} RENAME TO {_quote(old_table)}")
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {_quote(name)}")
+        # Release the id sequence (of an identity or a serial column), which is replaced by a new one
+        if identity:
+            cursor.execute(f"ALTER TABLE {_quote(old_table)} ALTER COLUMN id DROP IDENTITY")
+        elif old_sequence:
+            cursor.execute(f"ALTER TABLE {_quote(old_table)} ALTER COLUMN id DROP DEFAULT")
+            cursor.execute(f"DROP SEQUENCE {old_sequence}")
+
+        cursor.execute(f"CREATE TABLE {_quote(table)} (LIKE {_quote(old_table)}) PARTITION BY RANGE (created)")
+        cursor.execute(f"CREATE SEQUENCE {_quote(sequence)} OWNED BY {_quote(table)}.id")
+        cursor.execute("SELECT setval(%s, %s, %s)", [sequence, max(last_id, 1), last_id > 0])
+        cursor.execute(f"ALTER TABLE {_quote(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [sequence])
+        cursor.execute(f"CREATE TABLE {_quote(table + '_default')} PARTITION OF {_quote(table)} DEFAULT")
+
+        today = timezone.now().date()
+        create_partitions(interval, first_date or today, today)
+
+        cursor.execute(f"INSERT INTO {_quote(table)} SELECT * FROM {_quote(old_table)}")
+        cursor.execute(f"DROP TABLE {_quote(old_table)}")
+
+        cursor.execute(f"ALTER TABLE {_quote(table)} ADD PRIMARY KEY (id, created)")
+        for name, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}")
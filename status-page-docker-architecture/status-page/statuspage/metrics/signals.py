@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from metrics.models import Metric
+from statuspage.snapshot import invalidate_home_snapshot
+
+
+@receiver((post_save, post_delete), sender=Metric)
+def clear_home_snapshot(sender, **kwargs):
+    invalidate_home_snapshot()
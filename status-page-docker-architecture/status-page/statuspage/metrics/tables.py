@@ -12,5 +12,5 @@ class MetricTable(StatusPageTable):
 
     class Meta(StatusPageTable.Meta):
         model = Metric
-        fields = ('pk', 'id', 'title', 'suffix', 'visibility', 'expand', 'created', 'last_updated')
+        fields = ('pk', 'id', 'title', 'suffix', 'visibility', 'expand', 'max_points', 'created', 'last_updated')
         default_columns = ('id', 'title', 'suffix', 'visibility', 'expand')
@@ -1,3 +1,102 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .downsampling import lttb
+from .ingestion import validate_points, write_points
+from .models import Metric, MetricMinuteRollup, MetricPoint
+
+
+class ValidatePointsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.metric = Metric.objects.create(title='Metric', suffix='ms')
+
+    def test_valid_points(self):
+        valid, errors = validate_points([
+            {'metric': self.metric.pk, 'value': 1},
+            {'metric': self.metric.pk, 'value': '2.5', 'timestamp': str(timezone.now().timestamp())},
+            {'metric': self.metric.pk, 'value': 3, 'timestamp': timezone.now().isoformat()},
+        ])
+        self.assertEqual(errors, [])
+        self.assertEqual([(metric_id, value) for metric_id, value, _ in valid], [
+            (self.metric.pk, 1.0), (self.metric.pk, 2.5), (self.metric.pk, 3.0),
+        ])
+        self.assertTrue(all(timezone.is_aware(timestamp) for _, _, timestamp in valid))
+
+    def test_invalid_points(self):
+        points = [
+            'invalid',
+            {'metric': self.metric.pk + 1, 'value': 1},
+            {'metric': str(self.metric.pk), 'value': 1},
+            {'metric': float(self.metric.pk), 'value': 1},
+            {'metric': True, 'value': 1},
+            {'metric': self.metric.pk, 'value': True},
+            {'metric': self.metric.pk, 'value': 'nan'},
+            {'metric': self.metric.pk, 'value': None},
+            {'metric': self.metric.pk, 'value': 1, 'timestamp': 'yesterday'},
+        ]
+        valid, errors = validate_points(points)
+        self.assertEqual(valid, [])
+        self.assertEqual([index for index, _ in errors], list(range(len(points))))
+
+    @override_settings(METRIC_RETENTION=31)
+    def test_points_outside_retention(self):
+        old = (timezone.now() - datetime.timedelta(days=32)).timestamp()
+        valid, errors = validate_points([{'metric': self.metric.pk, 'value': 1, 'timestamp': old}])
+        self.assertEqual(valid, [])
+        self.assertEqual(len(errors), 1)
+
+
+class WritePointsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.metric = Metric.objects.create(title='Metric', suffix='ms')
+
+    def test_write_points(self):
+        now = timezone.now().replace(microsecond=0)
+        write_points([(self.metric.pk, 1.5, now), (self.metric.pk, -2.0, now - datetime.timedelta(minutes=1))])
+        self.assertEqual(
+            list(self.metric.points.order_by('created').values_list('value', 'created')),
+            [(-2.0, now - datetime.timedelta(minutes=1)), (1.5, now)],
+        )
+
+    @mock.patch('metrics.ingestion._enqueue_recalculation')
+    def test_late_points_recalculate_rollups(self, enqueue_recalculation):
+        now = timezone.now()
+        MetricMinuteRollup.objects.create(metric=self.metric, bucket=now, count=1, min=1, max=1, sum=1, last=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            write_points([(self.metric.pk, 1, now + datetime.timedelta(minutes=1))])
+        enqueue_recalculation.assert_not_called()
+
+        late = now - datetime.timedelta(hours=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            write_points([(self.metric.pk, 1, late)])
+        enqueue_recalculation.assert_called_once_with(late, late)
+        self.assertEqual(MetricPoint.objects.count(), 2)
+
+
+class LTTBTestCase(TestCase):
+
+    def test_short_series(self):
+        self.assertEqual(list(lttb([1, 2, 3], [1, 2, 3], 5)), [0, 1, 2])
+        self.assertEqual(list(lttb(list(range(10)), list(range(10)), 0)), list(range(10)))
+
+    def test_downsampling(self):
+        x = list(range(1000))
+        y = [0.0] * 1000
+        y[500] = 100.0
+        y[700] = -100.0
+        indices = list(lttb(x, y, 50))
+
+        self.assertEqual(len(indices), 50)
+        self.assertEqual(indices, sorted(set(indices)))
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        # Peaks and dips are kept
+        self.assertIn(500, indices)
+        self.assertIn(700, indices)
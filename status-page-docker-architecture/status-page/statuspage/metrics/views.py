@@ -7,7 +7,7 @@ from django.views import View
 from statuspage.views import generic
 from utilities.forms import ConfirmationForm
 from utilities.views import register_model_view
-from .models import Metric
+from .models import Metric, METRIC_ROLLUP_MODELS
 from . import tables
 from . import forms
 from . import filtersets
@@ -75,6 +75,8 @@ class MetricPointsDeleteView(LoginRequiredMixin, PermissionRequiredMixin, View):
         form = ConfirmationForm(request.POST)
         if form.is_valid():
             metric.points.all().delete()
+            for model in METRIC_ROLLUP_MODELS:
+                model.objects.filter(metric=metric).delete()
             messages.success(request, "Metric Points deleted")
             return redirect('metrics:metric', pk=pk)
 
@@ -38,6 +38,9 @@ class QueuingConfig(AppConfig):
                 (maintenance_automation, '* * * * *'),
                 (subscriber_automation, '* * * * *'),
                 (metric_automation, '0 0 * * *'),
+                (metric_buffer_automation, '* * * * *'),
+                (metric_rollup_automation, '* * * * *'),
+                (outbox_automation, '* * * * *'),
                 (housekeeping, '0 4 * * *'),
             ]
 
@@ -98,12 +101,48 @@ def maintenance_automation():
 
 
 def metric_automation():
-    from metrics.models import MetricPoint
+    from django.conf import settings
+    from metrics.models import MetricPoint, METRIC_ROLLUP_MODELS
+    from metrics.partitions import create_partitions, drop_expired_partitions, is_partitioned
+    from statuspage.config import get_config
+
+    partitioned = settings.METRIC_PARTITIONING and is_partitioned()
+    if partitioned:
+        today = timezone.now().date()
+        create_partitions(settings.METRIC_PARTITIONING, today, today + timezone.timedelta(days=7))
+
+    retention = get_config().METRIC_RETENTION
+    if retention:
+        datenow = timezone.now().replace(microsecond=0, second=0, minute=0, hour=0)
+        daterange = datenow - timezone.timedelta(days=retention)
+        if partitioned:
+            # Drop the partitions that expired completely; the remaining points are deleted row by row
+            drop_expired_partitions(daterange)
+        MetricPoint.objects.filter(created__lte=daterange).delete()
+
+    for model in METRIC_ROLLUP_MODELS:
+        model.delete_expired()
+
+
+def metric_buffer_automation():
+    from metrics.buffer import flush_buffer
+
+    flush_buffer()
+
+
+def metric_rollup_automation():
+    from metrics.models import MetricRollup
+
+    MetricRollup.aggregate_all()
+
 
-    datenow = timezone.now().replace(microsecond=0, second=0, minute=0, hour=0)
-    daterange = datenow - timezone.timedelta(days=31)
+def outbox_automation():
+    from subscribers.outbox import delete_expired_entries, enqueue_dispatch, get_pending_entries
 
-    MetricPoint.objects.filter(created__lte=daterange).delete()
+    delete_expired_entries()
+    # Picks up the entries whose dispatch was never enqueued or needs to be retried
+    if get_pending_entries().exists():
+        enqueue_dispatch()
 
 
 def subscriber_automation():
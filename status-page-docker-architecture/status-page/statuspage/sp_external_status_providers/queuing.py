@@ -30,8 +30,9 @@ def sync_external_status_pages():
                     c.group_name = None
                 c.save()
 
-                if c.component:
-                    c.component.status = ExternalStatusComponent.status(status_name=component['status'])
+                status = ExternalStatusComponent.status(status_name=component['status'])
+                if c.component and c.component.status != status:
+                    c.component.status = status
                     c.component.save()
 
     for m in components_to_delete:
@@ -1,6 +1,10 @@
 import datetime
 
+from django.utils import timezone
+
+from metrics.buffer import buffer_points
 from metrics.models import MetricPoint
+from statuspage.config import get_config
 from sp_uptimerobot.models import UptimeRobotMonitor
 from sp_uptimerobot.uptimerobot import UptimeRobot
 
@@ -34,14 +38,17 @@ def sync_uptimerobot_data():
         m.status_id = 0 if has_maintenance_window() else monitor['status']
         m.save()
 
-        if not m.paused and m.component:
+        if not m.paused and m.component and m.component.status != m.status:
             m.component.status = m.status
             m.component.save()
 
         if not m.paused and m.metric and not has_maintenance_window() and len(monitor['response_times']) > 0:
+            value = monitor['response_times'][0]['value']
+            if get_config().METRIC_WRITE_BEHIND and buffer_points([(m.metric_id, value, timezone.now())]):
+                continue
             mp = MetricPoint()
             mp.metric = m.metric
-            mp.value = monitor['response_times'][0]['value']
+            mp.value = value
             mp.save()
 
     for m in monitors_to_delete:
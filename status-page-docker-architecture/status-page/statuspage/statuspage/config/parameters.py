@@ -43,6 +43,23 @@ PARAMS = (
         default=False,
         field=forms.BooleanField,
     ),
+    ConfigParam(
+        name='HISTORY_DAYS',
+        label='Incident / Maintenance history days',
+        default=7,
+        description="Number of days of resolved Incidents and completed Maintenances shown on the home page",
+        field=forms.IntegerField,
+        field_kwargs={'min_value': 1},
+    ),
+
+    ConfigParam(
+        name='HOME_SNAPSHOT_TIMEOUT',
+        label='Home page cache timeout',
+        default=60,
+        description="Seconds after which the cached public home page is rebuilt even without changes, e.g. to refresh "
+                    "metrics (set to zero to only rebuild on changes)",
+        field=forms.IntegerField
+    ),
 
     ConfigParam(
         name='CUSTOM_STYLE_HEADER',
@@ -177,6 +194,71 @@ PARAMS = (
         field=forms.IntegerField
     ),
 
+    # Metrics
+    ConfigParam(
+        name='METRIC_RETENTION',
+        label='Metric point retention',
+        default=31,
+        description="Days to retain raw metric points (set to zero for unlimited)",
+        field=forms.IntegerField
+    ),
+    ConfigParam(
+        name='METRIC_WRITE_BEHIND',
+        label='Buffer metric points',
+        default=False,
+        description="Buffer submitted metric points in Redis and write them to the database in the background",
+        field=forms.BooleanField
+    ),
+    ConfigParam(
+        name='METRIC_BUFFER_MAX_POINTS',
+        label='Metric point buffer size',
+        default=100000,
+        description="Maximum number of buffered metric points; further points are written to the database directly",
+        field=forms.IntegerField,
+        field_kwargs={'min_value': 0},
+    ),
+    ConfigParam(
+        name='METRIC_MINUTE_ROLLUP_RETENTION',
+        label='Metric minute rollup retention',
+        default=31,
+        description="Days to retain per-minute metric aggregates (set to zero for unlimited)",
+        field=forms.IntegerField
+    ),
+    ConfigParam(
+        name='METRIC_HOUR_ROLLUP_RETENTION',
+        label='Metric hour rollup retention',
+        default=365,
+        description="Days to retain hourly metric aggregates (set to zero for unlimited)",
+        field=forms.IntegerField
+    ),
+    ConfigParam(
+        name='METRIC_DAY_ROLLUP_RETENTION',
+        label='Metric day rollup retention',
+        default=0,
+        description="Days to retain daily metric aggregates (set to zero for unlimited)",
+        field=forms.IntegerField
+    ),
+
+    # Notifications
+    ConfigParam(
+        name='COMPONENT_STATUS_NOTIFICATION_DELAY',
+        label='Component status notification delay',
+        default=60,
+        description="Seconds to wait before notifying subscribers about a component status change; changes which are "
+                    "reverted within this time are not notified",
+        field=forms.IntegerField,
+        field_kwargs={'min_value': 0},
+    ),
+    ConfigParam(
+        name='NOTIFICATION_DIGEST_WINDOW',
+        label='Notification digest window',
+        default=0,
+        description="Seconds to hold back notifications, merging all notifications for a subscriber within this "
+                    "window into one digest email (set to zero to send every notification immediately)",
+        field=forms.IntegerField,
+        field_kwargs={'min_value': 0},
+    ),
+
     # User preferences
     ConfigParam(
         name='DEFAULT_USER_PREFERENCES',
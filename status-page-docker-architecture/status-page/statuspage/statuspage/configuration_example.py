@@ -111,6 +111,11 @@ EMAIL = {
     'TIMEOUT': 10,  # seconds
     'FROM_EMAIL': '',
     'SUBJECT_PREFIX': '[Status-Page] ',
+    'BATCH_SIZE': 100,  # messages sent over one connection by a background task (fewer if RATE_LIMIT requires it)
+    'CONNECTIONS': 4,  # maximum number of concurrent connections to the server (0 for unlimited)
+    'RATE_LIMIT': 0,  # maximum number of messages per second sent by all workers together (0 for unlimited)
+    'RATE_LIMIT_BURST': None,  # messages which may be sent at once after an idle period (defaults to RATE_LIMIT)
+    'RATE_LIMIT_TIMEOUT': 60,  # seconds a message may wait for the rate limit before it is rejected and retried later
 }
 
 # IP addresses recognized as internal to the system. The debugging toolbar will be available only to clients accessing
@@ -129,6 +134,11 @@ LOGIN_TIMEOUT = None
 # the default value of this setting is derived from the installed location.
 # MEDIA_ROOT = '/opt/status-page/statuspage/media'
 
+# Store metric points in a table partitioned by their creation time, with 'daily' or 'monthly' partitions. Expired
+# partitions are dropped as a whole instead of deleting their points row by row. Run `manage.py metric_partitions
+# --convert` once after enabling this setting. (Default: None [not partitioned])
+METRIC_PARTITIONING = None
+
 # Overwrite Field Choices for specific Models (Note that this may break functionality!
 # Please check the docs, before overwriting any choices.
 FIELD_CHOICES = {}
@@ -149,6 +159,20 @@ PLUGINS_CONFIG = {
 # Maximum execution time for background tasks, in seconds.
 RQ_DEFAULT_TIMEOUT = 300
 
+# Timeouts for establishing the connection to a webhook receiver and for waiting for its response, in seconds.
+WEBHOOK_CONNECT_TIMEOUT = 5
+WEBHOOK_READ_TIMEOUT = 30
+
+# Maximum number of connections kept alive per webhook receiver and worker process. Connections are only reused
+# across tasks by workers which do not fork per task, i.e. `manage.py rqworker` with the option
+# `--worker-class utilities.rqworker.PersistentWorker` as in the bundled Docker and systemd setups. Otherwise, they
+# are only reused within a task delivering an event to several webhooks (see WEBHOOK_CONCURRENCY).
+WEBHOOK_POOL_SIZE = 10
+
+# Deliver each event to all of its webhooks from a single background task, sending up to this many requests
+# concurrently, instead of from one task per webhook. Set to 0 to disable.
+WEBHOOK_CONCURRENCY = 0
+
 # The name to use for the csrf token cookie.
 CSRF_COOKIE_NAME = 'csrftoken'
 
@@ -69,6 +69,7 @@ LOGGING = getattr(configuration, 'LOGGING', {})
 LOGIN_REQUIRED = True
 LOGIN_TIMEOUT = getattr(configuration, 'LOGIN_TIMEOUT', None)
 MEDIA_ROOT = getattr(configuration, 'MEDIA_ROOT', os.path.join(BASE_DIR, 'media')).rstrip('/')
+METRIC_PARTITIONING = getattr(configuration, 'METRIC_PARTITIONING', None)
 PLUGINS = getattr(configuration, 'PLUGINS', [])
 PLUGINS_CONFIG = getattr(configuration, 'PLUGINS_CONFIG', {})
 QUEUE_MAPPINGS = getattr(configuration, 'QUEUE_MAPPINGS', {})
@@ -81,6 +82,10 @@ SHORT_DATETIME_FORMAT = getattr(configuration, 'SHORT_DATETIME_FORMAT', 'Y-m-d H
 SHORT_TIME_FORMAT = getattr(configuration, 'SHORT_TIME_FORMAT', 'H:i:s')
 TIME_FORMAT = getattr(configuration, 'TIME_FORMAT', 'g:i a')
 TIME_ZONE = getattr(configuration, 'TIME_ZONE', 'UTC')
+WEBHOOK_CONCURRENCY = getattr(configuration, 'WEBHOOK_CONCURRENCY', 0)
+WEBHOOK_CONNECT_TIMEOUT = getattr(configuration, 'WEBHOOK_CONNECT_TIMEOUT', 5)
+WEBHOOK_POOL_SIZE = getattr(configuration, 'WEBHOOK_POOL_SIZE', 10)
+WEBHOOK_READ_TIMEOUT = getattr(configuration, 'WEBHOOK_READ_TIMEOUT', 30)
 
 for param in PARAMS:
     if hasattr(configuration, param.name):
@@ -173,6 +178,11 @@ EMAIL_SSL_KEYFILE = EMAIL.get('SSL_KEYFILE')
 EMAIL_SUBJECT_PREFIX = EMAIL.get('SUBJECT_PREFIX', '[Status-Page] ')
 EMAIL_USE_SSL = EMAIL.get('USE_SSL', False)
 EMAIL_USE_TLS = EMAIL.get('USE_TLS', False)
+EMAIL_BATCH_SIZE = EMAIL.get('BATCH_SIZE', 100)
+EMAIL_CONNECTIONS = EMAIL.get('CONNECTIONS', 4)
+EMAIL_RATE_LIMIT = EMAIL.get('RATE_LIMIT', 0)
+EMAIL_RATE_LIMIT_BURST = EMAIL.get('RATE_LIMIT_BURST')
+EMAIL_RATE_LIMIT_TIMEOUT = EMAIL.get('RATE_LIMIT_TIMEOUT', 60)
 EMAIL_TIMEOUT = EMAIL.get('TIMEOUT', 10)
 SERVER_EMAIL = EMAIL.get('FROM_EMAIL')
 DEFAULT_FROM_EMAIL = EMAIL.get('FROM_EMAIL')
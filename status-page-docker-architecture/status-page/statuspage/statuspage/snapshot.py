@@ -0,0 +1,65 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+from statuspage.config import get_config
+
+__all__ = (
+    'get_home_snapshot',
+    'invalidate_home_snapshot',
+)
+
+HOME_SNAPSHOT_CACHE_KEY = 'home_snapshot'
+HOME_SNAPSHOT_LOCK_TIMEOUT = 30
+
+logger = logging.getLogger('statuspage.snapshot')
+
+
+def _get_cache_key(language, stale=False):
+    key = f'{HOME_SNAPSHOT_CACHE_KEY}_{language}'
+    if stale:
+        return f'{key}_stale'
+    return key
+
+
+def get_home_snapshot(builder):
+    """
+    Return the rendered public home page content for the active language, calling `builder()` to render it if no
+    fresh snapshot is cached. While one process rebuilds an invalidated snapshot, concurrent requests are served the
+    previous (stale) copy instead of all hitting the database at once.
+    """
+    language = translation.get_language() or settings.LANGUAGE_CODE
+    key = _get_cache_key(language)
+
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return mark_safe(snapshot)
+
+    locked = cache.add(f'{key}_lock', True, HOME_SNAPSHOT_LOCK_TIMEOUT)
+    if not locked:
+        snapshot = cache.get(_get_cache_key(language, stale=True))
+        if snapshot is not None:
+            return mark_safe(snapshot)
+
+    try:
+        snapshot = str(builder())
+        cache.set(key, snapshot, get_config().HOME_SNAPSHOT_TIMEOUT or None)
+        cache.set(_get_cache_key(language, stale=True), snapshot, None)
+        logger.debug(f"Rebuilt home snapshot ({language})")
+    finally:
+        # Without a stale copy, requests rebuild the snapshot without the lock; only its holder may release it
+        if locked:
+            cache.delete(f'{key}_lock')
+
+    return mark_safe(snapshot)
+
+
+def invalidate_home_snapshot():
+    """
+    Discard the cached home page snapshots of all languages, forcing a rebuild on the next request.
+    """
+    languages = {settings.LANGUAGE_CODE, *(code for code, _ in settings.LANGUAGES)}
+    cache.delete_many([_get_cache_key(language) for language in languages])
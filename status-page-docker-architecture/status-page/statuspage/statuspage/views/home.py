@@ -1,18 +1,22 @@
+import datetime
 from itertools import chain
 
 from django.db.models import Prefetch, Q
+from django.db.models.functions import TruncDate
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from components.choices import ComponentStatusChoices
 from components.models import ComponentGroup, Component
 from incidents.choices import IncidentStatusChoices
-from incidents.models import Incident
+from incidents.models import ComponentDailyStatus, Incident
 from maintenances.choices import MaintenanceStatusChoices
 from maintenances.models import Maintenance
 from metrics.models import Metric
 from statuspage.config import get_config
+from statuspage.snapshot import get_home_snapshot
 from statuspage.views import BaseView
 
 
@@ -23,60 +27,82 @@ __all__ = (
 
 class HomeView(BaseView):
     template_name = 'home.html'
+    snapshot_template_name = 'home/snapshot.html'
 
     def get(self, request):
+        return render(request, self.template_name, {
+            'snapshot': get_home_snapshot(self.render_snapshot),
+        })
+
+    def render_snapshot(self):
+        """
+        Render the public status content (components, incidents, maintenances and metrics). The result is cached by
+        get_home_snapshot() and invalidated by the signal receivers of the affected models.
+        """
         config = get_config()
+        daily_statuses = ComponentDailyStatus.objects.filter(
+            date__gte=timezone.localdate() - timezone.timedelta(days=90),
+        )
         component_groups = ComponentGroup.objects.filter(visibility=True)\
             .prefetch_related(Prefetch('components', queryset=Component.objects.filter(visibility=True)),
-                              Prefetch('components__incidents', queryset=Incident.objects.filter(visibility=True)))
+                              Prefetch('components__daily_statuses', queryset=daily_statuses))
         ungrouped_components = Component.objects.filter(component_group=None, visibility=True)\
-            .prefetch_related(Prefetch('incidents', queryset=Incident.objects.filter(visibility=True)))
+            .prefetch_related(Prefetch('daily_statuses', queryset=daily_statuses))
+
+        # Updates (with their authors) and visible affected components are rendered for every listed
+        # incident / maintenance, so fetch them up front instead of once per object in the template.
+        incident_maintenance_prefetches = (
+            'updates__user',
+            Prefetch('components', queryset=Component.objects.filter(visibility=True).select_related('component_group')),
+        )
 
         open_incidents = Incident.objects.filter(
             ~Q(status=IncidentStatusChoices.RESOLVED),
             visibility=True,
-        )
+        ).prefetch_related(*incident_maintenance_prefetches)
         open_maintenances = Maintenance.objects.filter(
             ~Q(status=MaintenanceStatusChoices.SCHEDULED),
             ~Q(status=MaintenanceStatusChoices.COMPLETED),
             visibility=True,
-        )
+        ).prefetch_related(*incident_maintenance_prefetches)
         open_incidents_maintenances = list(chain(open_incidents, open_maintenances))
 
         upcoming_maintenances = Maintenance.objects.filter(
             status=MaintenanceStatusChoices.SCHEDULED,
             visibility=True,
-        )
+        ).prefetch_related(*incident_maintenance_prefetches)
 
+        history_days = config.HISTORY_DAYS
         datenow = timezone.now().replace(microsecond=0, second=0, minute=0, hour=0)
         datenow_end = timezone.now().replace(microsecond=0, second=59, minute=59, hour=23)
-        daterange = datenow - timezone.timedelta(days=7)
+        daterange = datenow - timezone.timedelta(days=history_days)
+        date_begin = list(datenow - timezone.timedelta(days=n) for n in range(history_days))
+        created_range = (date_begin[-1] if date_begin else datenow, datenow_end)
 
+        # Fetch the whole history window with one query per model and bucket it by (UTC) day of creation
         resolved_incidents = Incident.objects.filter(
             status=IncidentStatusChoices.RESOLVED,
             visibility=True,
             last_updated__range=(daterange, datenow_end),
-        )
+            created__range=created_range,
+        ).annotate(
+            created_date=TruncDate('created', tzinfo=datetime.timezone.utc),
+        ).prefetch_related(*incident_maintenance_prefetches)
         resolved_maintenances = Maintenance.objects.filter(
             status=MaintenanceStatusChoices.COMPLETED,
             visibility=True,
             last_updated__range=(daterange, datenow_end),
-        )
-
-        resolved_incidents_maintenances = []
+            created__range=created_range,
+        ).annotate(
+            created_date=TruncDate('created', tzinfo=datetime.timezone.utc),
+        ).prefetch_related(*incident_maintenance_prefetches)
 
-        date_begin = list(datenow - timezone.timedelta(days=n) for n in range(7))
-        date_end = list(datenow_end - timezone.timedelta(days=n) for n in range(7))
-        for count in range(7):
-            local_list = []
-            begin = date_begin[count]
-            end = date_end[count]
-            for incident in resolved_incidents.filter(created__range=(begin, end)):
-                local_list.append(incident)
-            for maintenance in resolved_maintenances.filter(created__range=(begin, end)):
-                local_list.append(maintenance)
+        history = {date.date(): [] for date in date_begin}
+        for incident_maintenance in chain(resolved_incidents, resolved_maintenances):
+            if incident_maintenance.created_date in history:
+                history[incident_maintenance.created_date].append(incident_maintenance)
 
-            resolved_incidents_maintenances.append((date_begin[count], local_list))
+        resolved_incidents_maintenances = [(date, history[date.date()]) for date in date_begin]
 
         components = Component.objects.all()
         degraded_components = list(filter(lambda c: c.status == ComponentStatusChoices.DEGRADED_PERFORMANCE, components))
@@ -108,7 +134,7 @@ class HomeView(BaseView):
         if incident_sum == 0 and config.HIDE_HISTORY_WHEN_EMPTY:
             should_show_history = False
 
-        return render(request, self.template_name, {
+        return render_to_string(self.snapshot_template_name, {
             'component_groups': component_groups,
             'ungrouped_components': ungrouped_components,
             'status': status,
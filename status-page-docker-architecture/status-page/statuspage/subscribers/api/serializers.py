@@ -16,5 +16,5 @@ class SubscriberSerializer(StatusPageModelSerializer):
 
     class Meta:
         model = Subscriber
-        fields = ('id', 'url', 'email', 'email_verified_at', 'management_key', 'incident_subscriptions',
+        fields = ('id', 'url', 'email', 'email_verified_at', 'incident_subscriptions', 'all_components',
                   'component_subscriptions', 'created', 'last_updated')
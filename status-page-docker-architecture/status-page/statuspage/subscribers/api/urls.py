@@ -1,3 +1,5 @@
+from django.urls import include, path
+
 from statuspage.api.routers import StatusPageRouter
 from . import views
 
@@ -8,4 +10,7 @@ router.APIRootView = views.SubscribersRootView
 router.register('subscribers', views.SubscriberViewSet)
 
 app_name = 'subscribers-api'
-urlpatterns = router.urls
+urlpatterns = [
+    path('mail-stats/', views.MailStatsView.as_view(), name='mail_stats'),
+    path('', include(router.urls)),
+]
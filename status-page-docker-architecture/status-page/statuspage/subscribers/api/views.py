@@ -1,9 +1,14 @@
+from django.conf import settings
+from rest_framework.response import Response
 from rest_framework.routers import APIRootView
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
 from subscribers.api import serializers
 from subscribers import filtersets
-from subscribers.models import Subscriber
+from subscribers.models import OutboxEntry, Subscriber
+from subscribers.outbox import get_failed_entries, get_pending_entries
+from utilities.utils import get_mail_rate_limiter
 
 
 class SubscribersRootView(APIRootView):
@@ -18,3 +23,22 @@ class SubscriberViewSet(ModelViewSet):
     queryset = Subscriber.objects.all()
     serializer_class = serializers.SubscriberSerializer
     filterset_class = filtersets.SubscriberFilterSet
+
+
+class MailStatsView(APIView):
+    """
+    Statistics of the outbound mail delivery: the number of pending outbox entries, of outbox entries which failed
+    permanently (until they are deleted after the retention period) and, with EMAIL RATE_LIMIT, the number of messages
+    which passed the rate limiter, which were rejected by it, which had to wait for it and their total wait time in
+    seconds.
+    """
+    queryset = OutboxEntry.objects.none()
+
+    def get(self, request):
+        rate_limiter = get_mail_rate_limiter()
+        return Response({
+            'outbox_pending': get_pending_entries().filter(subscriber__isnull=False).count(),
+            'outbox_failed': get_failed_entries().count(),
+            'rate_limit': settings.EMAIL_RATE_LIMIT,
+            'rate_limiter': rate_limiter.get_stats() if rate_limiter else None,
+        })
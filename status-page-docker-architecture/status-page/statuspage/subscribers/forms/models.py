@@ -46,7 +46,8 @@ class PublicSubscriberForm(TailwindMixin, forms.Form):
 class PublicSubscriberManagementForm(StatusPageModelForm):
     fieldsets = (
         ('Subscriber', (
-            'incident_subscriptions', 'incident_notifications_subscribed_only', 'component_subscriptions',
+            'incident_subscriptions', 'incident_notifications_subscribed_only', 'all_components',
+            'component_subscriptions',
         )),
     )
 
@@ -58,6 +59,10 @@ class PublicSubscriberManagementForm(StatusPageModelForm):
         label='Receive Incident Notifications only for Subscribed Components',
         required=False,
     )
+    all_components = forms.BooleanField(
+        label='Subscribe to all Components',
+        required=False,
+    )
     component_subscriptions = forms.ModelMultipleChoiceField(
         queryset=Component.objects.filter(visibility=True),
         widget=StaticSelectMultiple(),
@@ -68,5 +73,6 @@ class PublicSubscriberManagementForm(StatusPageModelForm):
     class Meta:
         model = Subscriber
         fields = (
-            'incident_subscriptions', 'incident_notifications_subscribed_only', 'component_subscriptions',
+            'incident_subscriptions', 'incident_notifications_subscribed_only', 'all_components',
+            'component_subscriptions',
         )
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscribers', '0002_auto_20250904_0941'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('event', models.CharField(max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error', models.TextField(blank=True)),
+                ('subscriber', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbox_entries', to='subscribers.subscriber')),
+            ],
+            options={
+                'verbose_name_plural': 'outbox entries',
+                'ordering': ['pk'],
+                'indexes': [models.Index(condition=models.Q(('delivered_at__isnull', True)), fields=['next_attempt_at'], name='subscribers_outbox_pending')],
+                'constraints': [models.UniqueConstraint(fields=('event', 'object_id', 'subscriber'), name='subscribers_outboxentry_unique_event_object_subscriber')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscribers', '0003_outboxentry'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='outboxentry',
+            name='subscribers_outboxentry_unique_event_object_subscriber',
+        ),
+        migrations.AddField(
+            model_name='outboxentry',
+            name='data',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='outboxentry',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recipient_entries', to='subscribers.outboxentry'),
+        ),
+        migrations.AddConstraint(
+            model_name='outboxentry',
+            constraint=models.UniqueConstraint(fields=('parent', 'subscriber'), name='subscribers_outboxentry_unique_parent_subscriber'),
+        ),
+    ]
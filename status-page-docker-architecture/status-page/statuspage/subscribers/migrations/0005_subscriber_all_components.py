@@ -0,0 +1,54 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:52
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def set_all_components(apps, schema_editor):
+    """
+    Replace the subscriptions of Subscribers subscribed to every Component by the all_components flag. Subscribers
+    with individual subscriptions keep them.
+    """
+    Component = apps.get_model('components', 'Component')
+    Subscriber = apps.get_model('subscribers', 'Subscriber')
+    through = Subscriber.component_subscriptions.through
+
+    component_count = Component.objects.count()
+    partial = Subscriber.objects.annotate(
+        subscription_count=Count('component_subscriptions')
+    ).exclude(subscription_count=component_count)
+    Subscriber.objects.filter(pk__in=partial.values('pk')).update(all_components=False)
+    through.objects.filter(subscriber__all_components=True).delete()
+
+
+def unset_all_components(apps, schema_editor):
+    Component = apps.get_model('components', 'Component')
+    Subscriber = apps.get_model('subscribers', 'Subscriber')
+    through = Subscriber.component_subscriptions.through
+
+    component_ids = list(Component.objects.values_list('pk', flat=True))
+    for subscriber_id in Subscriber.objects.filter(all_components=True).values_list('pk', flat=True):
+        through.objects.bulk_create(
+            [through(subscriber_id=subscriber_id, component_id=component_id) for component_id in component_ids],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0002_auto_20250904_0941'),
+        ('subscribers', '0004_outboxentry_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriber',
+            name='all_components',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(
+            code=set_all_components,
+            reverse_code=unset_all_components,
+        ),
+    ]
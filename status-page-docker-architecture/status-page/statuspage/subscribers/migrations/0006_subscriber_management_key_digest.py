@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 00:53
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def set_management_key_digests(apps, schema_editor):
+    Subscriber = apps.get_model('subscribers', 'Subscriber')
+
+    subscribers = []
+    for subscriber in Subscriber.objects.exclude(management_key__isnull=True).exclude(management_key='').iterator():
+        subscriber.management_key_digest = hashlib.sha256(subscriber.management_key.encode()).hexdigest()
+        subscribers.append(subscriber)
+        if len(subscribers) >= 1000:
+            Subscriber.objects.bulk_update(subscribers, ['management_key_digest'])
+            subscribers = []
+    Subscriber.objects.bulk_update(subscribers, ['management_key_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscribers', '0005_subscriber_all_components'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriber',
+            name='management_key_digest',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(
+            code=set_management_key_digests,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
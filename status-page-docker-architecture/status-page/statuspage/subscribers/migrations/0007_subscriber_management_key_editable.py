@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscribers', '0006_subscriber_management_key_digest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscriber',
+            name='management_key',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True),
+        ),
+    ]
@@ -1,16 +1,14 @@
+import hashlib
 import uuid
 
-from django.conf import settings
 from django.db import models
-from django.template.loader import render_to_string
+from django.db.models import Q
 from django.urls import reverse
+from django.utils import timezone
 
 from statuspage.config import get_config
 from statuspage.models import StatusPageModel
 from components.models import Component
-import django_rq
-
-from utilities.utils import send_mail
 
 
 class Subscriber(StatusPageModel):
@@ -21,10 +19,21 @@ class Subscriber(StatusPageModel):
         blank=True,
         null=True,
     )
+    # The management key grants access to the Subscriber's management pages, so it is only ever shown to the
+    # Subscriber, in the links sent to them
     management_key = models.CharField(
         max_length=255,
         blank=True,
         null=True,
+        editable=False,
+    )
+    # Subscribers are looked up by the digest of their management key, which has a fixed width and a unique index
+    management_key_digest = models.CharField(
+        max_length=64,
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False,
     )
     incident_subscriptions = models.BooleanField(
         default=True,
@@ -32,6 +41,10 @@ class Subscriber(StatusPageModel):
     incident_notifications_subscribed_only = models.BooleanField(
         default=False,
     )
+    # Subscribed to all Components, including future ones, without storing a subscription per Component
+    all_components = models.BooleanField(
+        default=True,
+    )
     component_subscriptions = models.ManyToManyField(
         to=Component,
         related_name='subscribers',
@@ -47,19 +60,22 @@ class Subscriber(StatusPageModel):
     def get_absolute_url(self):
         return reverse('subscribers:subscriber', args=[self.pk])
 
+    def serialize_object(self):
+        data = super().serialize_object()
+        data.pop('management_key', None)
+        data.pop('management_key_digest', None)
+        return data
+
     def save(self, *args, **kwargs):
         is_new = self.pk is None
 
         if is_new:
             self.management_key = uuid.uuid4()
+        self.management_key_digest = self.get_management_key_digest(self.management_key)
 
         super().save(*args, **kwargs)
 
         if is_new and self.email_verified_at is None:
-            components = Component.objects.all()
-            for component in components:
-                self.component_subscriptions.add(component)
-
             config = get_config()
             self.send_mail(
                 subject=f'Verify your Subscription to {config.SITE_TITLE}',
@@ -67,30 +83,96 @@ class Subscriber(StatusPageModel):
                 ignore_email_verification=True,
             )
 
+    @staticmethod
+    def get_management_key_digest(management_key):
+        if not management_key:
+            return None
+        return hashlib.sha256(str(management_key).encode()).hexdigest()
+
     @classmethod
     def get_by_management_key(cls, management_key):
-        try:
-            return cls.objects.get(management_key=management_key)
-        except:
+        """
+        Return the Subscriber with the given management key, or None. This is the lookup used by all public
+        subscriber views; it is served by the unique index of the key's digest.
+        """
+        digest = cls.get_management_key_digest(management_key)
+        if digest is None:
             return None
+        return cls.objects.filter(management_key_digest=digest).first()
 
     def send_mail(self, subject, template, context=None, ignore_email_verification=False, headers={}):
-        if context is None:
-            context = {}
+        from subscribers.notifications import NotificationRenderer
+
         if not self.email_verified_at and not ignore_email_verification:
             return None
-        config = get_config()
-        extra_context = ({
-            'site_url': f'{settings.SITE_URL}',
-            'site_title': f'{config.SITE_TITLE}',
-            'verification_url': settings.SITE_URL + reverse('subscriber_verify', kwargs={'management_key': self.management_key}),
-            'management_url': settings.SITE_URL + reverse('subscriber_manage', kwargs={'management_key': self.management_key}),
-            'unsubscribe_url': settings.SITE_URL + reverse('subscriber_unsubscribe', kwargs={'management_key': self.management_key}),
-            **context,
-        })
-
-        message = render_to_string(f'emails/{template}.txt', extra_context)
-        html_message = render_to_string(f'emails/{template}.html', extra_context)
-
-        django_rq.enqueue(send_mail, subject=subject, message=message, html_message=html_message,
-                          recipient_list=[self.email], headers=headers)
+
+        # Notifications to many Subscribers should share one NotificationRenderer instead
+        NotificationRenderer(template, context).send_mail(
+            self, subject, ignore_email_verification=ignore_email_verification, headers=headers
+        )
+
+
+class OutboxEntry(models.Model):
+    """
+    A notification pending delivery, recorded in the same transaction as the change it is about. An entry without a
+    Subscriber stands for the whole notification event and is expanded into one entry per recipient, referencing it as
+    their parent, when dispatched (see subscribers.outbox).
+    """
+    event = models.CharField(
+        max_length=50,
+    )
+    object_id = models.PositiveBigIntegerField()
+    data = models.JSONField(
+        default=dict,
+        blank=True,
+    )
+    parent = models.ForeignKey(
+        to='self',
+        on_delete=models.CASCADE,
+        related_name='recipient_entries',
+        blank=True,
+        null=True,
+    )
+    subscriber = models.ForeignKey(
+        to=Subscriber,
+        on_delete=models.CASCADE,
+        related_name='outbox_entries',
+        blank=True,
+        null=True,
+    )
+    created = models.DateTimeField(
+        default=timezone.now,
+    )
+    delivered_at = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+    )
+    error = models.TextField(
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ['pk']
+        constraints = (
+            models.UniqueConstraint(
+                fields=('parent', 'subscriber'),
+                name='%(app_label)s_%(class)s_unique_parent_subscriber'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('next_attempt_at',),
+                condition=Q(delivered_at__isnull=True),
+                name='subscribers_outbox_pending',
+            ),
+        )
+        verbose_name_plural = 'outbox entries'
+
+    def __str__(self):
+        return f'{self.event} {self.object_id} - {self.subscriber or "all recipients"}'
@@ -0,0 +1,207 @@
+import re
+import uuid
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+import django_rq
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import escape
+
+from statuspage.config import get_config
+from utilities.utils import get_mail_domain, send_mail
+from .models import Subscriber
+
+__all__ = (
+    'Notification',
+    'NotificationRenderer',
+    'get_digest_notification',
+    'get_notification_recipients',
+    'get_update_summary',
+    'get_thread_headers',
+)
+
+# Context variables holding per-Subscriber URLs, mapped to the URL names they are built from
+SUBSCRIBER_URLS = {
+    'verification_url': 'subscriber_verify',
+    'management_url': 'subscriber_manage',
+    'unsubscribe_url': 'subscriber_unsubscribe',
+}
+
+
+class NotificationRenderer:
+    """
+    Render the text and HTML versions of a notification template once for all recipients. The per-Subscriber URLs
+    are rendered as placeholder tokens, which are replaced by each recipient's URLs with plain string operations.
+    """
+
+    def __init__(self, template, context=None):
+        config = get_config()
+        token = uuid.uuid4().hex
+        placeholders = {name: f'__{name}_{token}__' for name in SUBSCRIBER_URLS}
+        context = {
+            'site_url': f'{settings.SITE_URL}',
+            'site_title': f'{config.SITE_TITLE}',
+            **placeholders,
+            **(context or {}),
+        }
+
+        # Split both renderings into literal parts and the names of the placeholders in between
+        pattern = re.compile('|'.join(re.escape(placeholder) for placeholder in placeholders.values()))
+        names = {placeholder: name for name, placeholder in placeholders.items()}
+        self.parts = {}
+        for kind in ('txt', 'html'):
+            rendered = render_to_string(f'emails/{template}.{kind}', context)
+            self.parts[kind] = (pattern.split(rendered), [names[match] for match in pattern.findall(rendered)])
+
+        # Each URL consists of a common prefix and suffix around the management key
+        self.url_parts = {}
+        for name, url_name in SUBSCRIBER_URLS.items():
+            prefix, suffix = reverse(url_name, kwargs={'management_key': token}).split(token)
+            self.url_parts[name] = (f'{settings.SITE_URL}{prefix}', suffix)
+
+    @staticmethod
+    def _join(parts, values):
+        literals, names = parts
+        rendered = [literals[0]]
+        for name, literal in zip(names, literals[1:]):
+            rendered.append(values[name])
+            rendered.append(literal)
+        return ''.join(rendered)
+
+    def render(self, subscriber):
+        """
+        Return the text and HTML message for the given Subscriber.
+        """
+        # Both templates are rendered with autoescaping enabled
+        urls = {
+            name: escape(f'{prefix}{subscriber.management_key}{suffix}')
+            for name, (prefix, suffix) in self.url_parts.items()
+        }
+
+        return self._join(self.parts['txt'], urls), self._join(self.parts['html'], urls)
+
+    def prepare_mail(self, subscriber, subject, headers=None):
+        """
+        Return the notification for the given Subscriber as a dict of `send_mail()` arguments, e.g. for
+        `send_mail_batch()`.
+        """
+        message, html_message = self.render(subscriber)
+        return {
+            'subject': subject,
+            'message': message,
+            'html_message': html_message,
+            'recipient_list': [subscriber.email],
+            'headers': headers or {},
+        }
+
+    def send_mail(self, subscriber, subject, ignore_email_verification=False, headers=None):
+        """
+        Enqueue the notification for delivery to the given Subscriber (if the email address has been verified).
+        """
+        if not subscriber.email_verified_at and not ignore_email_verification:
+            return None
+
+        django_rq.enqueue(send_mail, **self.prepare_mail(subscriber, subject, headers=headers))
+
+
+@dataclass
+class Notification:
+    """
+    A notification about an Incident or Maintenance event, sent to many Subscribers. The templates are rendered on
+    first use. The summary (Markdown) stands for the notification in digests.
+    """
+    template: str
+    context: dict
+    subject: str
+    get_headers: Callable
+    recipients: QuerySet
+    summary: str = ''
+
+    @cached_property
+    def renderer(self):
+        return NotificationRenderer(self.template, self.context)
+
+    def prepare_mail(self, subscriber):
+        """
+        Return the notification for the given Subscriber as a dict of `send_mail()` arguments.
+        """
+        return self.renderer.prepare_mail(subscriber, subject=self.subject, headers=self.get_headers(subscriber.id))
+
+
+def get_digest_notification(notifications):
+    """
+    Return a Notification merging the given Notifications, in this order, into a single digest.
+    """
+    subjects = {notification.subject for notification in notifications}
+    return Notification(
+        template='digest',
+        context={'notifications': notifications},
+        subject=subjects.pop() if len(subjects) == 1 else f'{len(notifications)} Status Updates',
+        # Digests are not part of any thread
+        get_headers=lambda subscriber_id: {},
+        recipients=Subscriber.objects.none(),
+    )
+
+
+def get_update_summary(update):
+    """
+    Return the summary of an IncidentUpdate or MaintenanceUpdate for digests.
+    """
+    if update is None:
+        return ''
+    return f'{update.get_status_display() if update.new_status else "Update"} - {update.text}'
+
+
+def subscribed_to_components(component_ids):
+    """
+    Return a filter for the Subscribers subscribed to any of the given Components, either explicitly or by being
+    subscribed to all Components.
+    """
+    component_subscriptions = Subscriber.component_subscriptions.through.objects.filter(
+        subscriber_id=OuterRef('pk'),
+        component_id__in=list(component_ids),
+    )
+    return Q(all_components=True) | Q(Exists(component_subscriptions))
+
+
+def get_notification_recipients(component_ids):
+    """
+    Return the verified Subscribers to notify about an Incident or Maintenance affecting the given Components, as a
+    single query: all Subscribers with incident subscriptions, except those who only want notifications for their
+    subscribed Components and are subscribed to none of the given ones.
+    """
+    return Subscriber.objects.filter(
+        Q(incident_notifications_subscribed_only=False) | subscribed_to_components(component_ids),
+        incident_subscriptions=True,
+        email_verified_at__isnull=False,
+    )
+
+
+def get_thread_headers(kind, object_id, update_id=0, reference_ids=None):
+    """
+    Return a function building the Message-ID header, and the References header if `reference_ids` is given, of a
+    notification for a Subscriber ID. Message IDs have the form "<{kind}-{object_id}-{update_id}-{subscriber_id}@
+    {mail domain}>", the initial notification having the update ID 0. The References header lists the initial
+    notification followed by the updates of `reference_ids`. The headers are assembled once, so only the Subscriber
+    ID needs to be filled in per recipient.
+    """
+    domain = get_mail_domain()
+    message_id = f'<{kind}-{object_id}-{update_id}-\0@{domain}>'
+    references = None
+    if reference_ids is not None:
+        references = ' '.join(
+            f'<{kind}-{object_id}-{reference_id}-\0@{domain}>' for reference_id in (0, *reference_ids)
+        )
+
+    def build(subscriber_id):
+        subscriber_id = str(subscriber_id)
+        headers = {'Message-ID': message_id.replace('\0', subscriber_id)}
+        if references is not None:
+            headers['References'] = references.replace('\0', subscriber_id)
+        return headers
+
+    return build
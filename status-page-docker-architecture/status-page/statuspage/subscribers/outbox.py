@@ -0,0 +1,282 @@
+import logging
+import time
+
+import django_rq
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rq import Queue
+
+from statuspage.config import get_config
+from statuspage.constants import RQ_QUEUE_DEFAULT
+from utilities.utils import MAIL_CONNECTION_UNAVAILABLE, MAIL_RATE_LIMIT_EXCEEDED, send_mail_batch
+from .models import OutboxEntry
+from .notifications import get_digest_notification
+
+__all__ = (
+    'OUTBOX_EVENTS',
+    'add_to_outbox',
+    'delete_expired_entries',
+    'dispatch_outbox',
+    'enqueue_dispatch',
+    'get_batch_size',
+    'get_failed_entries',
+    'get_pending_entries',
+)
+
+# Notification events, mapped to the functions returning the Notification about an object given the event's data
+# as keyword arguments (or None if there is nothing to notify about, e.g. because the object no longer exists)
+OUTBOX_EVENTS = {
+    'component_status_updated': 'components.notifications.get_component_status_notification',
+    'incident_created': 'incidents.notifications.get_incident_created_notification',
+    'incident_updated': 'incidents.notifications.get_incident_updated_notification',
+    'maintenance_created': 'maintenances.notifications.get_maintenance_created_notification',
+    'maintenance_updated': 'maintenances.notifications.get_maintenance_updated_notification',
+}
+# Number of delivery attempts per entry; the delay between attempts doubles, starting at one minute
+OUTBOX_MAX_ATTEMPTS = 5
+# Number of seconds after which an entry is retried if it has not been sent because the mail rate limit or connection
+# slots were exhausted; this does not count as a delivery attempt
+OUTBOX_POSTPONE_DELAY = 60
+# Number of days delivered and failed entries are kept
+OUTBOX_RETENTION = 7
+# Fraction of the job timeout (RQ_DEFAULT_TIMEOUT) after which a dispatch job stops claiming batches and enqueues a
+# new job, and the fraction which sending a batch should take when the mail is rate limited
+OUTBOX_JOB_BUDGET = 0.5
+OUTBOX_BATCH_BUDGET = 0.25
+# Fields of an entry which are updated when it is dispatched
+OUTBOX_UPDATE_FIELDS = ('delivered_at', 'attempts', 'next_attempt_at', 'error')
+
+logger = logging.getLogger('statuspage.subscribers.outbox')
+
+
+def _get_queue():
+    return django_rq.get_queue(get_config().QUEUE_MAPPINGS.get('mail', RQ_QUEUE_DEFAULT))
+
+
+def enqueue_dispatch(workers=1):
+    """
+    Enqueue `workers` jobs dispatching the outbox in parallel.
+    """
+    queue = _get_queue()
+    with queue.connection.pipeline() as pipeline:
+        queue.enqueue_many([Queue.prepare_data(dispatch_outbox) for _ in range(workers)], pipeline=pipeline)
+        pipeline.execute()
+
+
+def add_to_outbox(event, object_id, data=None, delay=0):
+    """
+    Record a notification event in the outbox as part of the current transaction, to be expanded after `delay`
+    seconds. Without a delay, the outbox is dispatched once the transaction has been committed; if that fails, or if
+    the event is delayed, the entry is picked up by the next scheduled dispatch.
+    """
+    entry = OutboxEntry.objects.create(
+        event=event,
+        object_id=object_id,
+        data=data or {},
+        next_attempt_at=timezone.now() + timezone.timedelta(seconds=delay),
+    )
+    if not delay:
+        transaction.on_commit(enqueue_dispatch, robust=True)
+    return entry
+
+
+def get_pending_entries(now=None):
+    """
+    Return the undelivered outbox entries which are due for a delivery attempt.
+    """
+    return OutboxEntry.objects.filter(
+        delivered_at__isnull=True,
+        next_attempt_at__lte=now or timezone.now(),
+        attempts__lt=OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def get_failed_entries():
+    """
+    Return the undelivered outbox entries which will not be retried, as all of their delivery attempts have failed.
+    """
+    return OutboxEntry.objects.filter(delivered_at__isnull=True, attempts__gte=OUTBOX_MAX_ATTEMPTS)
+
+
+def get_batch_size():
+    """
+    Return the number of entries to claim per batch: EMAIL_BATCH_SIZE, or with EMAIL RATE_LIMIT at most as many as can
+    be sent within OUTBOX_BATCH_BUDGET of the job timeout while EMAIL_CONNECTIONS workers share the rate limit.
+    """
+    if not settings.EMAIL_RATE_LIMIT:
+        return settings.EMAIL_BATCH_SIZE
+    seconds = settings.RQ_DEFAULT_TIMEOUT * OUTBOX_BATCH_BUDGET
+    size = int(settings.EMAIL_RATE_LIMIT * seconds / max(settings.EMAIL_CONNECTIONS, 1))
+    return max(1, min(settings.EMAIL_BATCH_SIZE, size))
+
+
+def _fail(entry, error, now):
+    entry.attempts += 1
+    entry.error = error
+    entry.next_attempt_at = now + timezone.timedelta(minutes=2 ** (entry.attempts - 1))
+    if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+        logger.error(f"Giving up on outbox entry {entry.pk} after {entry.attempts} attempts: {error}")
+    else:
+        logger.warning(f"Failed to deliver outbox entry {entry.pk} (attempt {entry.attempts}): {error}")
+
+
+def _postpone(entry, error, now):
+    entry.error = error
+    entry.next_attempt_at = now + timezone.timedelta(seconds=OUTBOX_POSTPONE_DELAY)
+    logger.info(f"Postponing outbox entry {entry.pk}: {error}")
+
+
+def _expand(entry, notification, now, due):
+    """
+    Create the entries of all recipients of the notification event, due at `due`, with a single INSERT ... SELECT.
+    Entries which already exist are left untouched, so expanding an event twice does not send any notification twice.
+    """
+    sql, params = notification.recipients.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(OutboxEntry._meta.db_table)} "
+            f"(event, object_id, data, parent_id, subscriber_id, created, attempts, next_attempt_at, error) "
+            f"SELECT %s, %s, '{{}}', %s, recipient.id, %s, 0, %s, '' FROM ({sql}) recipient ON CONFLICT DO NOTHING",
+            [entry.event, entry.object_id, entry.pk, now, due, *params]
+        )
+        logger.debug(f"Expanded {entry.event} {entry.object_id} to {cursor.rowcount} recipients")
+
+
+def _prepare_mail(subscriber, items, notifications):
+    """
+    Return the mail for a Subscriber about the given (entry, Notification) tuples: the notification itself if there is
+    only one, or a digest of all of them. Digests are rendered once per combination of notifications.
+    """
+    if len(items) == 1:
+        return items[0][1].prepare_mail(subscriber)
+
+    key = ('digest', *(entry.parent_id for entry, _ in items))
+    if key not in notifications:
+        notifications[key] = get_digest_notification([notification for _, notification in items])
+    return notifications[key].prepare_mail(subscriber)
+
+
+def _dispatch_batch(notifications, size):
+    """
+    Claim up to `size` pending entries, skipping the ones claimed by other workers, and deliver them over a single
+    SMTP connection. The entries are claimed in a short transaction by postponing their next attempt until after the
+    job timeout, and are marked delivered one message at a time while sending. A worker which is killed mid-batch thus
+    does not send any message twice; its unsent entries are retried once their claim has expired. With a
+    NOTIFICATION_DIGEST_WINDOW, recipient entries are held back for the window, and all other undelivered entries of
+    the claimed entries' Subscribers are claimed along with them and merged into one digest per Subscriber. Returns the
+    number of claimed entries and whether any notification event has been expanded.
+    """
+    now = timezone.now()
+    window = get_config().NOTIFICATION_DIGEST_WINDOW
+    claimed_until = now + timezone.timedelta(seconds=settings.RQ_DEFAULT_TIMEOUT)
+    expanded = False
+
+    with transaction.atomic():
+        entries = list(
+            get_pending_entries(now).select_for_update(skip_locked=True, of=('self',)).select_related(
+                'parent', 'subscriber'
+            ).order_by('next_attempt_at', 'pk')[:size]
+        )
+        if window and entries:
+            entries += OutboxEntry.objects.select_for_update(skip_locked=True, of=('self',)).select_related(
+                'parent', 'subscriber'
+            ).filter(
+                delivered_at__isnull=True,
+                attempts__lt=OUTBOX_MAX_ATTEMPTS,
+                subscriber__in={entry.subscriber_id for entry in entries if entry.subscriber_id},
+            ).exclude(pk__in=[entry.pk for entry in entries])
+
+        # The (entry, Notification) tuples of each mail to send
+        groups = {}
+        for entry in sorted(entries, key=lambda entry: entry.pk):
+            # Recipient entries share the Notification of their event
+            event = entry.parent or entry
+            try:
+                if event.pk not in notifications:
+                    with transaction.atomic():
+                        notifications[event.pk] = import_string(OUTBOX_EVENTS[event.event])(
+                            event.object_id, **event.data
+                        )
+                notification = notifications[event.pk]
+                if notification is None:
+                    entry.delivered_at = now
+                    entry.error = "Nothing to notify about"
+                elif entry.subscriber is None:
+                    with transaction.atomic():
+                        _expand(entry, notification, now, now + timezone.timedelta(seconds=window))
+                    entry.delivered_at = now
+                    expanded = True
+                else:
+                    entry.next_attempt_at = claimed_until
+                    groups.setdefault(entry.subscriber_id if window else entry.pk, []).append((entry, notification))
+            except Exception as e:
+                _fail(entry, str(e), now)
+
+        OutboxEntry.objects.bulk_update(entries, OUTBOX_UPDATE_FIELDS)
+
+    pending, messages = [], []
+    for items in groups.values():
+        group = [entry for entry, _ in items]
+        try:
+            messages.append(_prepare_mail(items[0][0].subscriber, items, notifications))
+            pending.append(group)
+        except Exception as e:
+            for entry in group:
+                _fail(entry, str(e), now)
+            OutboxEntry.objects.bulk_update(group, OUTBOX_UPDATE_FIELDS)
+
+    def record(index, error):
+        group = pending[index]
+        for entry in group:
+            if error is None:
+                entry.delivered_at = timezone.now()
+            elif error in (MAIL_RATE_LIMIT_EXCEEDED, MAIL_CONNECTION_UNAVAILABLE):
+                _postpone(entry, error, timezone.now())
+            else:
+                _fail(entry, error, timezone.now())
+        OutboxEntry.objects.bulk_update(group, OUTBOX_UPDATE_FIELDS)
+
+    if messages:
+        # Waiting for a connection slot must leave time for sending the batch within the job timeout
+        send_mail_batch(messages, callback=record, slot_timeout=settings.RQ_DEFAULT_TIMEOUT * OUTBOX_BATCH_BUDGET)
+
+    return len(entries), expanded
+
+
+def dispatch_outbox():
+    """
+    Background job delivering the pending outbox entries in batches until none are left. Any number of these jobs can
+    run in parallel; once a notification event has been expanded, additional jobs (up to EMAIL CONNECTIONS) are
+    enqueued to deliver its entries. After OUTBOX_JOB_BUDGET of the job timeout, the job leaves the remaining entries to
+    a new job instead of risking to be killed.
+    """
+    notifications = {}
+    size = get_batch_size()
+    deadline = time.monotonic() + settings.RQ_DEFAULT_TIMEOUT * OUTBOX_JOB_BUDGET
+    count = 0
+    while True:
+        claimed, expanded = _dispatch_batch(notifications, size)
+        if not claimed:
+            break
+        count += claimed
+        if expanded:
+            enqueue_dispatch(workers=max(settings.EMAIL_CONNECTIONS - 1, 1))
+        if time.monotonic() >= deadline:
+            enqueue_dispatch()
+            break
+
+    logger.debug(f"Dispatched {count} outbox entries")
+
+
+def delete_expired_entries():
+    """
+    Delete the outbox entries delivered more than OUTBOX_RETENTION days ago, and the failed entries created more than
+    OUTBOX_RETENTION days ago.
+    """
+    cutoff = timezone.now() - timezone.timedelta(days=OUTBOX_RETENTION)
+    return OutboxEntry.objects.filter(
+        Q(delivered_at__lt=cutoff) | Q(delivered_at__isnull=True, attempts__gte=OUTBOX_MAX_ATTEMPTS, created__lt=cutoff)
+    ).delete()
@@ -1,3 +1,103 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from incidents.models import Incident
+from utilities.utils import MAIL_CONNECTION_UNAVAILABLE, MAIL_RATE_LIMIT_EXCEEDED
+from .models import OutboxEntry, Subscriber
+from .outbox import (
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_POSTPONE_DELAY, dispatch_outbox, get_failed_entries, get_pending_entries,
+)
+
+
+def fail_with(error):
+    """
+    Return a replacement for `send_mail_batch()` which reports all messages as failed with the given error.
+    """
+    def send_mail_batch(messages, callback=None, **kwargs):
+        for index in range(len(messages)):
+            callback(index, error)
+        return [error] * len(messages)
+
+    return send_mail_batch
+
+
+@override_settings(EMAIL_CONNECTIONS=0, EMAIL_RATE_LIMIT=0, NOTIFICATION_DIGEST_WINDOW=0)
+@mock.patch('subscribers.outbox.enqueue_dispatch')
+class OutboxTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Subscriber.objects.bulk_create([
+            Subscriber(email=f'subscriber{i}@example.com', email_verified_at=timezone.now()) for i in range(3)
+        ])
+        Incident.objects.create(title='Incident', visibility=True, send_email=True)
+
+    def get_recipient_entries(self):
+        return OutboxEntry.objects.filter(subscriber__isnull=False)
+
+    def test_event_entry(self, enqueue_dispatch):
+        entry = OutboxEntry.objects.get()
+        self.assertEqual(entry.event, 'incident_created')
+        self.assertIsNone(entry.subscriber)
+        self.assertEqual(list(get_pending_entries()), [entry])
+
+    def test_dispatch(self, enqueue_dispatch):
+        dispatch_outbox()
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(Subscriber.objects.values_list('email', flat=True)),
+        )
+        self.assertFalse(OutboxEntry.objects.filter(delivered_at__isnull=True).exists())
+        enqueue_dispatch.assert_called()
+
+        # Delivered entries are not sent again
+        dispatch_outbox()
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_claimed_entries(self, enqueue_dispatch):
+        class Killed(Exception):
+            pass
+
+        with mock.patch('subscribers.outbox.send_mail_batch', side_effect=Killed), self.assertRaises(Killed):
+            dispatch_outbox()
+
+        # The entries of a worker which has been killed are retried once their claim has expired
+        self.assertEqual(self.get_recipient_entries().count(), 3)
+        self.assertFalse(get_pending_entries().exists())
+        expired = timezone.now() + datetime.timedelta(seconds=settings.RQ_DEFAULT_TIMEOUT + 1)
+        self.assertEqual(get_pending_entries(expired).count(), 3)
+        self.assertFalse(self.get_recipient_entries().exclude(attempts=0).exists())
+
+    def test_failed_delivery(self, enqueue_dispatch):
+        with mock.patch('subscribers.outbox.send_mail_batch', fail_with("Error")), \
+                self.assertLogs('statuspage.subscribers.outbox', 'WARNING'):
+            dispatch_outbox()
+            for attempt in range(1, OUTBOX_MAX_ATTEMPTS + 1):
+                entries = self.get_recipient_entries()
+                self.assertEqual(set(entries.values_list('attempts', 'error')), {(attempt, "Error")})
+                self.assertFalse(get_pending_entries().exists())
+                # Skip the backoff
+                entries.update(next_attempt_at=timezone.now())
+                dispatch_outbox()
+
+        self.assertEqual(get_failed_entries().count(), 3)
+        self.assertFalse(get_pending_entries().exists())
+
+    def test_postponed_delivery(self, enqueue_dispatch):
+        for error in (MAIL_RATE_LIMIT_EXCEEDED, MAIL_CONNECTION_UNAVAILABLE):
+            with self.subTest(error=error), mock.patch('subscribers.outbox.send_mail_batch', fail_with(error)):
+                now = timezone.now()
+                self.get_recipient_entries().update(next_attempt_at=now)
+                dispatch_outbox()
+
+                # Postponing an entry does not count as a delivery attempt
+                entries = self.get_recipient_entries()
+                self.assertEqual(set(entries.values_list('attempts', 'error')), {(0, error)})
+                self.assertFalse(get_pending_entries().exists())
+                later = now + datetime.timedelta(seconds=OUTBOX_POSTPONE_DELAY + 1)
+                self.assertEqual(get_pending_entries(later).count(), 3)
@@ -0,0 +1,373 @@
+import contextlib
+import random
+import timeit
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+def benchmark_historic_status(options, stack):
+    """
+    Render the 90-day status bars of 200 components with pysvg and with the string based renderer.
+    """
+    from pysvg.structure import Svg
+
+    from incidents.choices import IncidentImpactChoices
+    from utilities.pysvg_helpers import create_rect
+    from utilities.svg import IMPACT_FILLS, DEFAULT_FILL, render_historic_status_svg
+
+    today = timezone.localdate()
+    impacts = IncidentImpactChoices.values()
+    components = [
+        {
+            today - timezone.timedelta(days=random.randrange(90)): SimpleNamespace(
+                worst_impact=random.choice(impacts),
+                incident_count=random.randint(1, 3),
+            ) for _ in range(random.randrange(10))
+        } for _ in range(200)
+    ]
+
+    def render_pysvg():
+        for daily_statuses in components:
+            svg = Svg(width=816, height=34)
+            for index in range(90):
+                date = today - timezone.timedelta(days=89 - index)
+                status = daily_statuses.get(date)
+                svg.addElement(create_rect(
+                    index=index,
+                    date=date,
+                    incidents=status.incident_count if status else 0,
+                    fill=IMPACT_FILLS.get(status.worst_impact, DEFAULT_FILL) if status else DEFAULT_FILL,
+                ))
+            svg.getXML()
+
+    def render_strings():
+        for daily_statuses in components:
+            render_historic_status_svg(daily_statuses, today=today)
+
+    return {
+        'pysvg': render_pysvg,
+        'string fragments': render_strings,
+    }
+
+
+def benchmark_metric_labels(options, stack):
+    """
+    Format the labels of a 30-day metric chart with one point per minute, compiling a Template per point and with
+    the memoizing datetime formatter.
+    """
+    from django.template import Context, Template
+
+    from utilities.utils import format_datetimes
+
+    now = timezone.now()
+    created = [now - timezone.timedelta(minutes=minutes) for minutes in range(60 * 24 * 30, 0, -1)]
+
+    def render_templates():
+        for value in created:
+            Template('{{ point.created }}').render(Context({'point': SimpleNamespace(created=value)}))
+
+    def render_formatter():
+        format_datetimes(created)
+
+    return {
+        'template per point': render_templates,
+        'format_datetimes': render_formatter,
+    }
+
+
+def benchmark_notification_rendering(options, stack):
+    """
+    Render an incident notification for 10,000 subscribers, rendering the templates per subscriber and rendering them
+    once with placeholders for the subscriber URLs.
+    """
+    import uuid
+
+    from django.conf import settings
+    from django.template.loader import render_to_string
+    from django.urls import reverse
+
+    from incidents.models import Incident, IncidentUpdate
+    from statuspage.config import get_config
+    from subscribers.models import Subscriber
+    from subscribers.notifications import NotificationRenderer
+
+    incident = Incident(pk=1, title='Database outage')
+    context = {
+        'incident': incident,
+        'update': IncidentUpdate(incident=incident, text='We are **investigating** the issue.'),
+        'components': [],
+    }
+    subscribers = [
+        Subscriber(pk=index, email=f'subscriber{index}@example.com', management_key=str(uuid.uuid4()),
+                   email_verified_at=timezone.now())
+        for index in range(10000)
+    ]
+
+    def render_per_subscriber():
+        config = get_config()
+        for subscriber in subscribers:
+            extra_context = {
+                'site_url': f'{settings.SITE_URL}',
+                'site_title': f'{config.SITE_TITLE}',
+                'verification_url': settings.SITE_URL + reverse(
+                    'subscriber_verify', kwargs={'management_key': subscriber.management_key}
+                ),
+                'management_url': settings.SITE_URL + reverse(
+                    'subscriber_manage', kwargs={'management_key': subscriber.management_key}
+                ),
+                'unsubscribe_url': settings.SITE_URL + reverse(
+                    'subscriber_unsubscribe', kwargs={'management_key': subscriber.management_key}
+                ),
+                **context,
+            }
+            render_to_string('emails/incidents/created.txt', extra_context)
+            render_to_string('emails/incidents/created.html', extra_context)
+
+    def render_once():
+        renderer = NotificationRenderer('incidents/created', context)
+        for subscriber in subscribers:
+            renderer.render(subscriber)
+
+    return {
+        'render per subscriber': render_per_subscriber,
+        'render once': render_once,
+    }
+
+
+def _start_webhook_receiver(stack, delay=0):
+    """
+    Start a webhook_receiver, which responds after `delay` seconds without printing the requests, in a background
+    thread and return its URL. The server is shut down when the given ExitStack is closed.
+    """
+    import threading
+    import time
+    from http.server import ThreadingHTTPServer
+
+    from extras.management.commands.webhook_receiver import WebhookHandler
+
+    class QuietWebhookHandler(WebhookHandler):
+
+        def do_ANY(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            response = b'Webhook received!\n'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, format_str, *args):
+            pass
+
+    class WebhookServer(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    server = WebhookServer(('localhost', 0), QuietWebhookHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stack.callback(server.server_close)
+    stack.callback(server.shutdown)
+    return f'http://localhost:{server.server_address[1]}/'
+
+
+def benchmark_webhook_delivery(options, stack):
+    """
+    Deliver 500 webhook requests to a local webhook_receiver, opening a new session per request and reusing the
+    pooled session of the webhook worker.
+    """
+    import requests
+
+    from extras.webhooks_worker import get_session
+
+    url = _start_webhook_receiver(stack)
+    body = b'{"event": "updated", "model": "incident", "data": {}}'
+    headers = {'Content-Type': 'application/json'}
+
+    def deliver_per_request():
+        for _ in range(500):
+            with requests.Session() as session:
+                session.post(url, data=body, headers=headers, timeout=5).raise_for_status()
+
+    def deliver_pooled():
+        session = get_session(url, True)
+        for _ in range(500):
+            session.post(url, data=body, headers=headers, timeout=5).raise_for_status()
+
+    return {
+        'session per request': deliver_per_request,
+        'pooled session': deliver_pooled,
+    }
+
+
+def benchmark_webhook_fanout(options, stack):
+    """
+    Deliver an event to 100 webhooks of a webhook_receiver which takes 20 ms per request, one after another and with
+    the concurrent dispatcher.
+    """
+    from django.test import override_settings
+
+    from extras.models import Webhook
+    from extras.webhooks_worker import process_webhook, process_webhooks
+
+    url = _start_webhook_receiver(stack, delay=0.02)
+    webhooks = [
+        Webhook(pk=index, name=f'Webhook {index}', payload_url=f'{url}{index}', http_content_type='application/json')
+        for index in range(100)
+    ]
+    kwargs = {
+        'model_name': 'incident',
+        'event': 'update',
+        'data': {'id': 1, 'title': 'Database outage'},
+        'timestamp': str(timezone.now()),
+        'username': 'admin',
+    }
+
+    def deliver_sequentially():
+        for webhook in webhooks:
+            process_webhook(webhook, **kwargs)
+
+    def deliver_concurrently():
+        with override_settings(WEBHOOK_CONCURRENCY=100):
+            process_webhooks(webhooks, **kwargs)
+
+    return {
+        'job per webhook': deliver_sequentially,
+        'concurrent dispatcher': deliver_concurrently,
+    }
+
+
+def benchmark_webhook_rendering(options, stack):
+    """
+    Render the URL, headers and body of 1,000 webhook deliveries, compiling the templates in a new environment per
+    render and reusing the compiled templates of each Webhook revision.
+    """
+    from jinja2.sandbox import SandboxedEnvironment
+
+    from extras.models import Webhook
+    from statuspage.config import get_config
+
+    webhooks = [
+        Webhook(
+            pk=index,
+            last_updated=timezone.now(),
+            payload_url=f'https://example.com/hooks/{index}/{{{{ model }}}}',
+            additional_headers='X-Event: {{ event }}\nX-Request-ID: {{ request_id }}',
+            body_template='{"text": "{{ username }} {{ event }} {{ model }} {{ data.title }}", "id": {{ data.id }}}',
+        ) for index in range(10)
+    ]
+    context = {
+        'event': 'updated',
+        'timestamp': str(timezone.now()),
+        'model': 'incident',
+        'username': 'admin',
+        'request_id': 'b1a5c4e2',
+        'data': {'id': 1, 'title': 'Database outage'},
+    }
+
+    def render_uncached():
+        for index in range(1000):
+            webhook = webhooks[index % len(webhooks)]
+            for template_code in (webhook.payload_url, webhook.additional_headers, webhook.body_template):
+                environment = SandboxedEnvironment()
+                environment.filters.update(get_config().JINJA2_FILTERS)
+                environment.from_string(source=template_code).render(**context)
+
+    def render_cached():
+        for index in range(1000):
+            webhook = webhooks[index % len(webhooks)]
+            webhook.render_payload_url(context)
+            webhook.render_headers(context)
+            webhook.render_body(context)
+
+    return {
+        'compile per render': render_uncached,
+        'cached templates': render_cached,
+    }
+
+
+def benchmark_webhook_conditions(options, stack):
+    """
+    Evaluate the conditions of 1,000 webhooks against 1,000 events, building a ConditionSet per evaluation and with
+    the rule sets compiled once per Webhook revision.
+    """
+    from extras.conditions import ConditionSet, compile_conditions
+
+    statuses = ('investigating', 'identified', 'monitoring', 'resolved')
+    impacts = ('none', 'minor', 'major', 'critical')
+    rulesets = [
+        {'and': [
+            {'attr': 'status', 'value': random.choice(statuses), 'negate': random.random() < 0.5},
+            {'or': [
+                {'attr': 'impact', 'op': 'in', 'value': random.sample(impacts, 2)},
+                {'attr': 'title', 'op': 'regex', 'value': r'^(Database|API) '},
+                {'attr': 'components.name', 'op': 'contains', 'value': f'Component {random.randrange(10)}'},
+            ]},
+        ]} for _ in range(1000)
+    ]
+    events = [
+        {
+            'id': index,
+            'title': f"{random.choice(('Database', 'API', 'Website'))} outage",
+            'status': random.choice(statuses),
+            'impact': random.choice(impacts),
+            'components': [{'id': pk, 'name': f'Component {pk}'} for pk in random.sample(range(10), 3)],
+        } for index in range(1000)
+    ]
+
+    def evaluate_rebuilt():
+        for data in events:
+            for ruleset in rulesets:
+                ConditionSet(ruleset).eval(data)
+
+    def evaluate_compiled():
+        for data in events:
+            for index, ruleset in enumerate(rulesets):
+                compile_conditions(ruleset, ('webhook', index, 'conditions'))(data)
+
+    return {
+        'ConditionSet per event': evaluate_rebuilt,
+        'compiled rule sets': evaluate_compiled,
+    }
+
+
+BENCHMARKS = {
+    'historic_status': benchmark_historic_status,
+    'metric_labels': benchmark_metric_labels,
+    'notification_rendering': benchmark_notification_rendering,
+    'webhook_conditions': benchmark_webhook_conditions,
+    'webhook_delivery': benchmark_webhook_delivery,
+    'webhook_fanout': benchmark_webhook_fanout,
+    'webhook_rendering': benchmark_webhook_rendering,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare the run time of different implementations of a performance critical code path"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'benchmark', choices=sorted(BENCHMARKS),
+            help="The benchmark to run"
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="Number of runs per implementation; the fastest run is reported (default: 5)"
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        # Benchmarks register the teardown of their fixtures (e.g. servers) on the stack
+        with contextlib.ExitStack() as stack:
+            implementations = BENCHMARKS[options['benchmark']](options, stack)
+
+            results = {}
+            for name, func in implementations.items():
+                results[name] = min(timeit.repeat(func, number=1, repeat=options['repeat']))
+
+        baseline = next(iter(results.values()))
+        for name, duration in results.items():
+            self.stdout.write(f'{name:<24} {duration * 1000:10.2f} ms  ({baseline / duration:.1f}x)', ending="\n")
@@ -0,0 +1,91 @@
+import time
+
+from django_redis import get_redis_connection
+
+__all__ = (
+    'TokenBucket',
+)
+
+# Refill the bucket for the time since the last call, then take the requested tokens. If there are not enough tokens,
+# they are reserved ahead (the bucket goes negative) if they are available within the maximum wait time, so concurrent
+# clients are served in order. Returns the seconds to wait before proceeding, or -1 if the request is rejected.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+
+local wait = 0
+if tokens < requested then
+    wait = (requested - tokens) / rate
+end
+if wait > max_wait then
+    redis.call('HINCRBY', KEYS[2], 'rejected', 1)
+    wait = -1
+else
+    tokens = tokens - requested
+    redis.call('HINCRBY', KEYS[2], 'acquired', 1)
+    if wait > 0 then
+        redis.call('HINCRBY', KEYS[2], 'waited', 1)
+        redis.call('HINCRBYFLOAT', KEYS[2], 'wait_seconds', wait)
+    end
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """
+    A token bucket rate limiter shared by all processes through Redis. The bucket holds up to `burst` tokens and is
+    refilled with `rate` tokens per second. The number of acquired and rejected requests, of requests which had to
+    wait and the total wait time are counted in a separate Redis hash (see `get_stats()`).
+    """
+
+    def __init__(self, key, rate, burst=None):
+        self.key = key
+        self.stats_key = f'{key}_stats'
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self.redis = get_redis_connection('default')
+        self.script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def reserve(self, tokens=1, max_wait=0):
+        """
+        Reserve `tokens` tokens, if they are available within `max_wait` seconds. Returns the seconds to wait before
+        using them, or None if the request is rejected.
+        """
+        wait = float(self.script(keys=[self.key, self.stats_key], args=[self.rate, self.burst, tokens, max_wait]))
+        return None if wait < 0 else wait
+
+    def acquire(self, tokens=1, timeout=60):
+        """
+        Wait until `tokens` tokens have been taken from the bucket. Returns the seconds waited, or None without waiting
+        if the tokens would not be available within `timeout` seconds.
+        """
+        wait = self.reserve(tokens, max_wait=timeout)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def get_stats(self):
+        """
+        Return the number of acquired and rejected requests, the number of requests which had to wait and their total
+        wait time in seconds.
+        """
+        stats = self.redis.hgetall(self.stats_key)
+        return {
+            'acquired': int(stats.get(b'acquired', 0)),
+            'rejected': int(stats.get(b'rejected', 0)),
+            'waited': int(stats.get(b'waited', 0)),
+            'wait_seconds': float(stats.get(b'wait_seconds', 0)),
+        }
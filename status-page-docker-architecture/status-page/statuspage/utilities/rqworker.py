@@ -1,10 +1,12 @@
+from django.db import close_old_connections, reset_queries
 from django_rq.queues import get_connection
-from rq import Retry, Worker
+from rq import Retry, SimpleWorker, Worker
 
-from statuspage.config import get_config
+from statuspage.config import clear_config, get_config
 from statuspage.constants import RQ_QUEUE_DEFAULT
 
 __all__ = (
+    'PersistentWorker',
     'get_queue_for_model',
     'get_rq_retry',
     'get_workers_for_queue',
@@ -34,3 +36,16 @@ def get_rq_retry():
     retry_interval = get_config().RQ_RETRY_INTERVAL
     if retry_max:
         return Retry(max=retry_max, interval=retry_interval)
+
+
+class PersistentWorker(SimpleWorker):
+    """
+    An RQ worker which executes jobs in its own process instead of forking a work horse per job, so the HTTP connection
+    pools of webhook deliveries are reused across jobs. Like in a new work horse, the configuration is reloaded and
+    stale database connections are closed before each job.
+    """
+    def execute_job(self, job, queue):
+        clear_config()
+        close_old_connections()
+        reset_queries()
+        return super().execute_job(job, queue)
@@ -0,0 +1,93 @@
+import datetime
+import functools
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import formats, timezone, translation
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from incidents.choices import IncidentImpactChoices
+
+__all__ = (
+    'get_historic_status_svg',
+    'invalidate_historic_status_svg',
+    'render_historic_status_svg',
+)
+
+HISTORIC_STATUS_DAYS = 90
+HISTORIC_STATUS_CACHE_KEY = 'historic_status'
+
+SVG_START = ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" version="1.1" '
+             'height="34" width="816"  >\n')
+SVG_END = '</svg>\n'
+RECT = ('<rect x="{x}" y="0" height="32" width="5" data-tooltip="{date}&lt;br&gt;Incident amount: {incidents}" '
+        'style="fill:{fill}; "  />\n')
+
+IMPACT_FILLS = {
+    IncidentImpactChoices.CRITICAL: 'rgb(239, 68, 68)',
+    IncidentImpactChoices.MAJOR: 'rgb(249, 115, 22)',
+    IncidentImpactChoices.MINOR: 'rgb(234, 179, 8)',
+}
+DEFAULT_FILL = 'rgb(34, 197, 94)'
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_date(date, language):
+    # The language is part of the cache key only; formatting uses the active language
+    return escape(formats.date_format(date))
+
+
+def render_historic_status_svg(daily_statuses, today=None):
+    """
+    Render the historic status bars of the last 90 days from a mapping of dates to ComponentDailyStatus objects.
+    """
+    today = today or timezone.localdate()
+    language = translation.get_language()
+    first_date = today - datetime.timedelta(days=HISTORIC_STATUS_DAYS - 1)
+
+    parts = [SVG_START]
+    for index in range(HISTORIC_STATUS_DAYS):
+        date = first_date + datetime.timedelta(days=index)
+        status = daily_statuses.get(date)
+        parts.append(RECT.format(
+            x=index * 9,
+            date=_format_date(date, language),
+            incidents=status.incident_count if status else 0,
+            fill=IMPACT_FILLS.get(status.worst_impact, DEFAULT_FILL) if status else DEFAULT_FILL,
+        ))
+    parts.append(SVG_END)
+
+    return mark_safe(''.join(parts))
+
+
+def _get_cache_key(component_id, date, language):
+    return f'{HISTORIC_STATUS_CACHE_KEY}_{component_id}_{date.isoformat()}_{language}'
+
+
+def get_historic_status_svg(component):
+    """
+    Return the historic status bars of a Component, cached per Component, day and language.
+    """
+    today = timezone.localdate()
+    key = _get_cache_key(component.pk, today, translation.get_language())
+
+    svg = cache.get(key)
+    if svg is None:
+        daily_statuses = {status.date: status for status in component.daily_statuses.all()}
+        svg = render_historic_status_svg(daily_statuses, today=today)
+        cache.set(key, str(svg), 60 * 60 * 24)
+
+    return mark_safe(svg)
+
+
+def invalidate_historic_status_svg(component_ids):
+    """
+    Discard the cached historic status bars of the given Components.
+    """
+    today = timezone.localdate()
+    languages = {settings.LANGUAGE_CODE, *(code for code, _ in settings.LANGUAGES)}
+    cache.delete_many([
+        _get_cache_key(component_id, today, language)
+        for component_id in component_ids for language in languages
+    ])
@@ -95,8 +95,7 @@ def metric(metric, range):
             datenow = timezone.now().replace(microsecond=0, second=0, minute=0)
             daterange = datenow - timezone.timedelta(hours=12)
 
-    labels = metric.get_metric_labels_json(now=datenow_end, range=daterange)
-    points = metric.get_metric_points_json(now=datenow_end, range=daterange)
+    labels, points = metric.get_metric_json(now=datenow_end, range=daterange)
 
     return {
         'metric': metric,
@@ -1,3 +1,93 @@
-from django.test import TestCase
+import smtplib
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .ratelimit import TokenBucket
+from .utils import MAIL_CONNECTION_SLOT_KEY, MAIL_CONNECTION_UNAVAILABLE, MAIL_RATE_LIMIT_EXCEEDED, send_mail_batch
+
+
+class TokenBucketTestCase(TestCase):
+
+    def setUp(self):
+        self.bucket = TokenBucket('test_token_bucket', rate=1, burst=2)
+
+    def tearDown(self):
+        self.bucket.redis.delete(self.bucket.key, self.bucket.stats_key)
+
+    def test_burst(self):
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertIsNone(self.bucket.reserve())
+
+    def test_reserve_ahead(self):
+        self.assertEqual(self.bucket.reserve(2), 0)
+        wait = self.bucket.reserve(max_wait=10)
+        self.assertGreater(wait, 0.5)
+        self.assertLessEqual(wait, 1)
+        # The reserved token is not handed out again
+        self.assertGreater(self.bucket.reserve(max_wait=10), 1.5)
+
+    def test_stats(self):
+        self.bucket.reserve(2)
+        self.bucket.reserve()
+        self.bucket.reserve(max_wait=10)
+        stats = self.bucket.get_stats()
+        self.assertEqual((stats['acquired'], stats['rejected'], stats['waited']), (2, 1, 1))
+        self.assertGreater(stats['wait_seconds'], 0)
+
+
+@override_settings(EMAIL_CONNECTIONS=0, EMAIL_RATE_LIMIT=0)
+class SendMailBatchTestCase(TestCase):
+    messages = [
+        {
+            'subject': 'Subject', 'message': 'Text', 'html_message': 'HTML',
+            'recipient_list': [f'{i}@example.com'], 'headers': {},
+        }
+        for i in range(3)
+    ]
+
+    def test_send_mail_batch(self):
+        callback = mock.Mock()
+        self.assertEqual(send_mail_batch(self.messages, callback=callback), [None, None, None])
+        recipients = [message['recipient_list'] for message in self.messages]
+        self.assertEqual([message.to for message in mail.outbox], recipients)
+        self.assertEqual(callback.call_args_list, [mock.call(0, None), mock.call(1, None), mock.call(2, None)])
+
+    def test_rejected_message(self):
+        send_messages = mail.backends.locmem.EmailBackend.send_messages
+
+        def reject_second(backend, messages):
+            if messages[0].to == ['1@example.com']:
+                raise smtplib.SMTPRecipientsRefused({'1@example.com': (550, b'Unknown')})
+            return send_messages(backend, messages)
+
+        with mock.patch.object(mail.backends.locmem.EmailBackend, 'send_messages', reject_second):
+            errors = send_mail_batch(self.messages)
+        self.assertIsNone(errors[0])
+        self.assertIsNotNone(errors[1])
+        self.assertIsNone(errors[2])
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(EMAIL_RATE_LIMIT=1)
+    @mock.patch('utilities.utils.get_mail_rate_limiter')
+    def test_rate_limit_exceeded(self, get_mail_rate_limiter):
+        get_mail_rate_limiter.return_value.acquire.side_effect = [0, None, 0]
+        self.assertEqual(send_mail_batch(self.messages), [None, MAIL_RATE_LIMIT_EXCEEDED, None])
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(EMAIL_CONNECTIONS=1)
+    def test_connection_unavailable(self):
+        slot = f'{MAIL_CONNECTION_SLOT_KEY}_0'
+        cache.add(slot, True, 60)
+        try:
+            self.assertEqual(send_mail_batch(self.messages, slot_timeout=0), [MAIL_CONNECTION_UNAVAILABLE] * 3)
+        finally:
+            cache.delete(slot)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(send_mail_batch(self.messages, slot_timeout=0), [None, None, None])
+        # The slot is released after sending
+        self.assertIsNone(cache.get(slot))
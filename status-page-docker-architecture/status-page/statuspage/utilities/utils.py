@@ -1,12 +1,22 @@
+import functools
+import logging
+import smtplib
+import threading
+import time
+from collections import OrderedDict
 from email.utils import make_msgid
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.serializers import serialize
 import json
 
 from django.db import transaction
 from django.http import QueryDict
+from django.utils import dateformat
+from django.utils.formats import get_format
+from django.utils.timezone import template_localtime
 from jinja2.sandbox import SandboxedEnvironment
 from mptt.models import MPTTModel
 import bleach
@@ -15,6 +25,7 @@ from extras.plugins import PluginConfig
 from incidents.choices import IncidentImpactChoices
 from components.choices import ComponentStatusChoices
 from statuspage.config import get_config
+from utilities.ratelimit import TokenBucket
 
 
 def title(value):
@@ -260,13 +271,52 @@ def deepmerge(original, new):
     return merged
 
 
-def render_jinja2(template_code, context):
+# Maximum number of compiled Jinja2 templates kept per process
+JINJA2_TEMPLATE_CACHE_SIZE = 1024
+
+_jinja2_templates = OrderedDict()
+_jinja2_templates_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def get_jinja2_environment():
     """
-    Render a Jinja2 template with the provided context. Return the rendered content.
+    Return the sandboxed Jinja2 environment shared by all templates of this process, including the JINJA2_FILTERS.
     """
     environment = SandboxedEnvironment()
     environment.filters.update(get_config().JINJA2_FILTERS)
-    return environment.from_string(source=template_code).render(**context)
+    return environment
+
+
+def get_jinja2_template(template_code, cache_key=None):
+    """
+    Return the compiled Jinja2 template of the given code. If a cache key is given, the compiled template is kept in
+    an LRU cache of JINJA2_TEMPLATE_CACHE_SIZE templates; the key must change whenever the template code does.
+    """
+    if cache_key is None:
+        return get_jinja2_environment().from_string(source=template_code)
+
+    with _jinja2_templates_lock:
+        template = _jinja2_templates.get(cache_key)
+        if template is not None:
+            _jinja2_templates.move_to_end(cache_key)
+            return template
+
+    template = get_jinja2_environment().from_string(source=template_code)
+    with _jinja2_templates_lock:
+        _jinja2_templates[cache_key] = template
+        if len(_jinja2_templates) > JINJA2_TEMPLATE_CACHE_SIZE:
+            _jinja2_templates.popitem(last=False)
+
+    return template
+
+
+def render_jinja2(template_code, context, cache_key=None):
+    """
+    Render a Jinja2 template with the provided context. Return the rendered content. See `get_jinja2_template()` for
+    the optional cache key.
+    """
+    return get_jinja2_template(template_code, cache_key).render(**context)
 
 
 def dict_to_filter_params(d, prefix=''):
@@ -301,12 +351,55 @@ def dict_to_filter_params(d, prefix=''):
     return params
 
 
+# Format characters whose output only depends on the date, or on the hour and minute of a datetime
+DATE_FORMAT_CHARS = frozenset('bdDEFjlLmMnNoStwWyYz')
+MINUTE_FORMAT_CHARS = frozenset('aAfgGhHiP')
+
+
+def format_datetimes(values, format='DATETIME_FORMAT'):
+    """
+    Format a sequence of datetimes the way the template engine renders them (converted to the current time zone and
+    using the localized format). Each format character is rendered only once per distinct day or minute instead of
+    once per value, which keeps formatting long series of closely spaced datetimes cheap.
+    :param values: An iterable of datetime objects
+    :param format: A format name (e.g. "DATETIME_FORMAT") or a format string
+    """
+    tokens = []
+    for index, piece in enumerate(dateformat.re_formatchars.split(str(get_format(format)))):
+        if index % 2:
+            tokens.append((piece, None))
+        elif piece:
+            tokens.append((None, dateformat.re_escaped.sub(r"\1", piece)))
+
+    formatted = {}
+    ret = []
+    for value in values:
+        value = template_localtime(value)
+        parts = []
+        for char, literal in tokens:
+            if char is None:
+                parts.append(literal)
+                continue
+            if char in DATE_FORMAT_CHARS:
+                key = (char, value.date())
+            elif char in MINUTE_FORMAT_CHARS:
+                key = (char, value.hour, value.minute)
+            else:
+                key = (char, value)
+            if key not in formatted:
+                formatted[key] = dateformat.format(value, char)
+            parts.append(formatted[key])
+        ret.append(''.join(parts))
+
+    return ret
+
+
 def get_mail_domain():
     splitted_domain = settings.SERVER_EMAIL.split("@")
     return splitted_domain[len(splitted_domain) - 1]
 
 
-def send_mail(subject, html_message, message, recipient_list, headers):
+def build_mail(subject, html_message, message, recipient_list, headers, connection=None):
     config = get_config()
     email = EmailMultiAlternatives(
         subject=f'{settings.EMAIL_SUBJECT_PREFIX}{subject}',
@@ -317,9 +410,119 @@ def send_mail(subject, html_message, message, recipient_list, headers):
             'Message-ID': make_msgid(domain=get_mail_domain()),
             **headers,
         },
+        connection=connection,
     )
     email.attach_alternative(f'{html_message}', 'text/html')
-    email.send(fail_silently=False)
+    return email
+
+
+def send_mail(subject, html_message, message, recipient_list, headers):
+    build_mail(subject, html_message, message, recipient_list, headers).send(fail_silently=False)
+
+
+MAIL_CONNECTION_SLOT_KEY = 'mail_connection_slot'
+MAIL_RATE_LIMIT_KEY = 'mail_rate_limit'
+# Error of messages which have not been sent because the rate limit was not available in time
+MAIL_RATE_LIMIT_EXCEEDED = "Rate limit exceeded"
+# Error of messages which have not been sent because no connection slot became available in time
+MAIL_CONNECTION_UNAVAILABLE = "No mail connection available"
+
+
+def get_mail_rate_limiter():
+    """
+    Return the TokenBucket enforcing EMAIL RATE_LIMIT across all workers, or None if sending is not rate limited.
+    """
+    if not settings.EMAIL_RATE_LIMIT:
+        return None
+    return TokenBucket(MAIL_RATE_LIMIT_KEY, settings.EMAIL_RATE_LIMIT, settings.EMAIL_RATE_LIMIT_BURST)
+
+
+def _acquire_mail_connection_slot(timeout):
+    """
+    Wait up to `timeout` seconds for one of the EMAIL_CONNECTIONS slots limiting the number of concurrent SMTP
+    connections and return its key, or None if none became available. Slots expire after the job timeout, so the slot
+    of a worker which has been killed is released eventually.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        for slot in range(settings.EMAIL_CONNECTIONS):
+            key = f'{MAIL_CONNECTION_SLOT_KEY}_{slot}'
+            if cache.add(key, True, settings.RQ_DEFAULT_TIMEOUT):
+                return key
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(remaining, 1))
+
+
+def send_mail_batch(messages, callback=None, slot_timeout=60):
+    """
+    Send a batch of messages, given as dicts of `send_mail()` arguments, over a single SMTP connection. If the
+    connection fails, it is reopened and the message is sent once more. Messages which are rejected by the server, or
+    fail twice, are logged and skipped, so the rest of the batch is still delivered. With EMAIL RATE_LIMIT, each
+    message waits for the shared rate limit and fails if it is not available within RATE_LIMIT_TIMEOUT seconds. With
+    EMAIL CONNECTIONS, all messages fail if no connection slot becomes available within `slot_timeout` seconds.
+    Returns a list with the error message of each message which failed, or None for each message which has been sent;
+    `callback(index, error)` is called with the same as soon as each message has been processed.
+    """
+    logger = logging.getLogger('statuspage.mail')
+    rate_limiter = get_mail_rate_limiter()
+    errors = []
+
+    slot = None
+    if settings.EMAIL_CONNECTIONS:
+        slot = _acquire_mail_connection_slot(slot_timeout)
+        if slot is None:
+            logger.warning(f"No mail connection available within {slot_timeout} seconds, not sending the batch")
+            for index in range(len(messages)):
+                errors.append(MAIL_CONNECTION_UNAVAILABLE)
+                if callback:
+                    callback(index, MAIL_CONNECTION_UNAVAILABLE)
+            return errors
+
+    # Opening the connection explicitly keeps it open across send_messages() calls
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for message in messages:
+            if rate_limiter and rate_limiter.acquire(timeout=settings.EMAIL_RATE_LIMIT_TIMEOUT) is None:
+                logger.warning(f"Rate limit exceeded, not sending mail to {message['recipient_list']}")
+                error = MAIL_RATE_LIMIT_EXCEEDED
+                errors.append(error)
+                if callback:
+                    callback(len(errors) - 1, error)
+                continue
+            error = None
+            for attempt in range(2):
+                try:
+                    build_mail(connection=connection, **message).send(fail_silently=False)
+                    error = None
+                    break
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    error = str(e)
+                    logger.error(f"Failed to send mail to {message['recipient_list']}: {e}")
+                    break
+                except OSError as e:
+                    # Includes all other SMTP errors; the connection is unusable after most of them
+                    error = str(e)
+                    connection.close()
+                    if attempt:
+                        logger.error(f"Failed to send mail to {message['recipient_list']}: {e}")
+                    else:
+                        logger.warning(f"Reconnecting to the mail server after an error: {e}")
+                    try:
+                        connection.open()
+                    except OSError as e:
+                        logger.error(f"Failed to reconnect to the mail server: {e}")
+            errors.append(error)
+            if callback:
+                callback(len(errors) - 1, error)
+    finally:
+        connection.close()
+        if slot:
+            cache.delete(slot)
+
+    return errors
 
 
 def on_transaction_commit(func):